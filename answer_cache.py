@@ -0,0 +1,131 @@
+"""
+의미 기반 답변 캐시 (선택 기능)
+같은 가족의 다른 보호자가 방금 물어본 것과 거의 같은 질문이면 gpt-4o 를 다시
+부르지 않고 저장된 답변을 돌려준다.
+
+- 키: 질문 임베딩의 코사인 유사도(threshold 이상) + 검색된 참고자료 지문(fingerprint)
+- 대화의 첫 질문만 캐시한다. 앞 대화에 기대는 후속 질문("이거 먹어도 돼?")은 다른
+  보호자의 답을 돌려줄 수 있으므로 app.py 에서 우회한다.
+- TTL 이 지난 답변은 버린다.
+- upload_docs.py 가 documents 테이블을 바꾸면 전체 무효화한다 (같은 호스트는 마커 파일,
+  그 밖에는 documents_version 콜백 값이 바뀐 것을 백그라운드로 확인).
+- 응급(Red Flag) 성격의 메시지는 항상 캐시를 우회한다 (red_flags.mentions_emergency).
+"""
+
+import hashlib
+import threading
+import time
+
+import numpy as np
+
+from documents_marker import read_marker_mtime
+
+
+def context_fingerprint(context: str) -> str:
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600,
+                 max_entries: int = 256, version_check_seconds: float = 60,
+                 documents_version=None):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version_check_seconds = version_check_seconds
+        # documents 테이블 버전(id 체크섬 등)을 돌려주는 콜백. 값이 바뀌면 전체 무효화
+        self._documents_version = documents_version
+        self._version = None
+        self._version_checked_at = 0.0
+        self._version_refreshing = False
+        self._marker_mtime = read_marker_mtime()
+        self._lock = threading.Lock()
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._entries: list[dict] = []
+        self.hits = 0
+        self.misses = 0
+
+    def _check_documents_version(self):
+        mtime = read_marker_mtime()
+        if mtime != self._marker_mtime:
+            self._marker_mtime = mtime
+            self._clear()
+        now = time.time()
+        if (self._documents_version is None or self._version_refreshing
+                or now - self._version_checked_at < self.version_check_seconds):
+            return
+        # 버전 조회는 documents 를 훑으므로 채팅 경로를 막지 않게 백그라운드에서 한다
+        self._version_checked_at = now
+        self._version_refreshing = True
+        threading.Thread(target=self._refresh_version, daemon=True).start()
+
+    def _refresh_version(self):
+        try:
+            version = self._documents_version()
+        except Exception:
+            version = None
+        with self._lock:
+            self._version_refreshing = False
+            if version is None:
+                return
+            if self._version is not None and version != self._version:
+                self._clear()
+            self._version = version
+
+    def _clear(self):
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._entries = []
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        keep = [i for i, e in enumerate(self._entries) if e["created_at"] >= cutoff]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = self._vectors[keep] if keep else np.empty((0, 0), dtype=np.float32)
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def get(self, query_vector, fingerprint: str) -> str | None:
+        with self._lock:
+            self._check_documents_version()
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+            scores = self._vectors @ self._normalize(query_vector)
+            for i in np.argsort(scores)[::-1]:
+                if scores[i] < self.threshold:
+                    break
+                if self._entries[i]["fingerprint"] == fingerprint:
+                    self.hits += 1
+                    return self._entries[i]["answer"]
+            self.misses += 1
+            return None
+
+    def put(self, query_vector, fingerprint: str, answer: str):
+        v = self._normalize(query_vector)[None, :]
+        with self._lock:
+            self._check_documents_version()
+            if self._entries:
+                self._vectors = np.vstack([self._vectors, v])
+            else:
+                self._vectors = v
+            self._entries.append({"fingerprint": fingerprint, "answer": answer,
+                                  "created_at": time.time()})
+            if len(self._entries) > self.max_entries:
+                self._entries = self._entries[-self.max_entries:]
+                self._vectors = self._vectors[-self.max_entries:]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
@@ -1,16 +1,45 @@
 import os
+import time
 import uuid
 import calendar
+import hmac
+from concurrent.futures import TimeoutError as FutureTimeout
 from datetime import datetime, date, timedelta
 
 os.environ.pop("http_proxy", None)
 os.environ.pop("https_proxy", None)
 
+import numpy as np
 import streamlit as st
-from openai import OpenAI
-from supabase import create_client
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import SupabaseVectorStore
+
+from answer_cache import context_fingerprint
+from calendar_grid import calendar_grid, month_cells
+from red_flags import detect as detect_red_flags, mentions_emergency, scan_record
+from chat_history import HistoryCompactor, estimate_tokens, make_summarizer, prompt_tokens
+from pain_analytics import trend_figure
+from model_router import FAST_MODEL, LARGE_MODEL, needs_escalation, route_chat
+from record_cache import month_range
+from report import generate_report
+from report_export import render_txt
+from resources import (
+    get_answer_cache,
+    get_attachment_store,
+    get_chat_executor,
+    get_retrieval_pool,
+    get_embedding_cache,
+    get_local_index,
+    get_local_store,
+    get_openai_client,
+    get_pain_aggregates,
+    get_profiler,
+    get_record_cache,
+    get_report_cache,
+    get_report_exporter,
+    get_route_stats,
+    get_supabase_client,
+    get_vector_store,
+    get_write_behind_queue,
+)
 
 st.set_page_config(page_title="김보듬 케어 대시보드", page_icon="🧸", layout="wide")
 
@@ -21,19 +50,33 @@ try:
     supabase_key = st.secrets["supabase"]["key"]
     admin_password = st.secrets["admin_password"]
     patient_info = dict(st.secrets.get("patient", {}))
+    embedding_cache_conf = dict(st.secrets.get("embedding_cache", {}))
+    answer_cache_conf = dict(st.secrets.get("answer_cache", {}))
+    chat_conf = dict(st.secrets.get("chat", {}))
+    write_behind_conf = dict(st.secrets.get("write_behind", {}))
+    record_cache_conf = dict(st.secrets.get("record_cache", {}))
+    report_cache_conf = dict(st.secrets.get("report_cache", {}))
+    report_export_conf = dict(st.secrets.get("report_export", {}))
+    local_index_conf = dict(st.secrets.get("local_index", {}))
+    profiler_conf = dict(st.secrets.get("profiler", {}))
+    attachment_conf = dict(st.secrets.get("attachments", {}))
+    calendar_conf = dict(st.secrets.get("calendar", {}))
+    router_conf = dict(st.secrets.get("router", {}))
+    analytics_conf = dict(st.secrets.get("analytics", {}))
+    local_store_conf = dict(st.secrets.get("local_store", {}))
 except KeyError as e:
     st.error(f"Secrets 설정이 필요합니다: {e}")
     st.stop()
 
-client = OpenAI(api_key=api_key)
-supabase_client = create_client(supabase_url, supabase_key)
-embeddings = OpenAIEmbeddings(openai_api_key=api_key, model="text-embedding-3-small")
-vector_store = SupabaseVectorStore(
-    client=supabase_client,
-    embedding=embeddings,
-    table_name="documents",
-    query_name="match_documents",
+# 클라이언트는 resources 모듈에서 프로세스당 한 번만 생성된다 (로그인 이후에 바인딩).
+
+# 구간 타이밍: [profiler] enabled = true 일 때만 기록 (꺼져 있으면 span 은 no-op)
+profiler = get_profiler(
+    bool(profiler_conf.get("enabled", False)),
+    int(profiler_conf.get("max_reruns", 20)),
+    profiler_conf.get("export_path", ""),
 )
+span = profiler.span
 
 # ── 2. 시스템 프롬프트 ───────────────────────────────────────────────────────
 system_instruction = """
@@ -66,56 +109,245 @@ system_instruction = """
 """
 
 # ── 3. 핵심 함수 ─────────────────────────────────────────────────────────────
-def retrieve_context(query: str, k: int = 3) -> str:
+def embed_query(query: str):
+    cache = get_embedding_cache(
+        embedding_cache_conf.get("db_path", ".cache/embeddings.sqlite3"),
+        int(embedding_cache_conf.get("max_items", 512)),
+        int(embedding_cache_conf.get("max_db_mb", 50)),
+    )
+    query_vector = cache.get(query)
+    if query_vector is None:
+        with span("openai.embedding"):
+            vector_store = get_vector_store(api_key, supabase_url, supabase_key)
+            query_vector = vector_store.embeddings.embed_query(query)
+        cache.put(query, query_vector)
+    return query_vector
+
+def search_local_index(query_vector, k):
+    # 선택 기능: [local_index] enabled = true. stale 이면 None (Supabase 로 대체)
+    if not local_index_conf.get("enabled"):
+        return None
+    index = get_local_index(
+        supabase_url, supabase_key,
+        local_index_conf.get("path", ".cache/documents_index"),
+        float(local_index_conf.get("max_age_seconds", 600)),
+    )
+    return index.search(query_vector, k)
+
+def retrieve_context(query: str, k: int = 3, query_vector=None) -> str:
+    with span("retrieve_context"):
+        return _retrieve_context(query, k, query_vector)
+
+def _retrieve_context(query: str, k: int = 3, query_vector=None) -> str:
     try:
-        docs = vector_store.similarity_search(query, k=k)
-        if not docs:
+        if query_vector is None:
+            query_vector = embed_query(query)
+        with span("retrieval.local_index"):
+            contents = search_local_index(query_vector, k)
+        if contents is None:
+            # 캐시 적중 시 임베딩 호출 없이 바로 match_documents 검색
+            with span("supabase.match_documents"):
+                vector_store = get_vector_store(api_key, supabase_url, supabase_key)
+                docs = vector_store.similarity_search_by_vector(query_vector, k=k)
+            contents = [doc.page_content for doc in docs]
+        if not contents:
             return ""
-        context = "\n\n---\n\n".join([doc.page_content for doc in docs])
+        context = "\n\n---\n\n".join(contents)
         return f"## 참고 자료 (최신 의료 데이터)\n{context}"
     except Exception:
         return ""
 
+def on_local_synced(table, rows):
+    # 로컬 저장소 동기화 스레드에서 호출된다: 서버에 올라간 기록을 캐시/집계에 반영
+    if table != "daily_records":
+        return
+    for row in rows:
+        get_records_cache().invalidate(row["record_date"])
+        if row.get("id") is not None:
+            get_analytics().apply(row)
+
+def get_local_writes():
+    # 선택 기능: [local_store] enabled = true 면 쓰기를 로컬 SQLite 에 먼저 커밋하고 백그라운드로 올린다
+    if not local_store_conf.get("enabled"):
+        return None
+    store = get_local_store(
+        supabase_url, supabase_key,
+        local_store_conf.get("db_path", ".cache/local_store.sqlite3"),
+        int(local_store_conf.get("batch_size", 50)),
+        float(local_store_conf.get("sync_interval", 2.0)),
+    )
+    store.on_synced = on_local_synced
+    return store
+
+def get_log_queue():
+    # 로컬 저장소를 쓰면 채팅 로그도 같은 곳에 남긴다 (enqueue/flush/stats 모양이 같다)
+    store = get_local_writes()
+    if store is not None:
+        return store
+    return get_write_behind_queue(
+        supabase_url, supabase_key,
+        int(write_behind_conf.get("batch_size", 50)),
+        float(write_behind_conf.get("flush_interval", 1.0)),
+    )
+
 def get_or_create_session():
     if "session_id" not in st.session_state:
         session_id = str(uuid.uuid4())
-        supabase_client.table("sessions").insert({"id": session_id}).execute()
+        # sessions / chat_logs insert 는 지연 쓰기 큐가 백그라운드에서 묶어서 보낸다
+        get_log_queue().enqueue("sessions", {"id": session_id})
         st.session_state.session_id = session_id
     return st.session_state.session_id
 
 def save_log_to_db(role, content):
-    session_id = get_or_create_session()
-    supabase_client.table("chat_logs").insert({
-        "session_id": session_id,
-        "role": role,
-        "content": str(content)
-    }).execute()
+    with span(f"chat_logs.{role}"):
+        session_id = get_or_create_session()
+        get_log_queue().enqueue("chat_logs", {
+            "session_id": session_id,
+            "role": role,
+            "content": str(content)
+        })
+
+def get_records_cache():
+    return get_record_cache(
+        supabase_url, supabase_key,
+        float(record_cache_conf.get("ttl_seconds", 300)),
+    )
+
+def raise_red_flag_alert(flags, source):
+    st.session_state.red_flag_alert = {"flags": flags, "source": source}
+
+def render_red_flag_banner(alert, dismissible=True):
+    reasons = " · ".join(f"{f['label']} (\"{f['evidence']}\")" for f in alert["flags"])
+    st.error(
+        f"🚨 **응급 신호가 감지되었습니다** — {alert['source']}\n\n{reasons}\n\n"
+        "지금 바로 **응급실을 방문하거나 119** 에 연락하세요. 항암 치료 중에는 "
+        "담당 병원 응급 연락처로 먼저 전화하셔도 됩니다.",
+        icon="🚑",
+    )
+    if dismissible and st.button("확인했습니다", key="red_flag_dismiss"):
+        st.session_state.pop("red_flag_alert", None)
+        st.rerun()
+
+def get_analytics():
+    return get_pain_aggregates(
+        supabase_url, supabase_key,
+        analytics_conf.get("db_path", ".cache/pain_aggregates.sqlite3"),
+        float(analytics_conf.get("sync_interval", 60)),
+    )
 
 def save_daily_record(record_date, caregiver_name, condition_text, pain_score, has_files):
-    result = supabase_client.table("daily_records").insert({
+    row = {
         "record_date": str(record_date),
         "caregiver_name": caregiver_name,
         "condition_text": condition_text,
         "pain_score": pain_score,
         "has_files": has_files
-    }).execute()
+    }
+    flags = scan_record(condition_text, pain_score)
+    if flags:
+        raise_red_flag_alert(flags, f"{record_date} 기록")
+    store = get_local_writes()
+    if store is not None:
+        # 로컬에 커밋하고 바로 돌아온다. 반환값은 서버 id 대신 client_key
+        return store.add("daily_records", row)
+    result = supabase_client.table("daily_records").insert(row).execute()
+    get_records_cache().invalidate(record_date)
+    if result.data:
+        # 일별 통증 집계에 이 행만 더한다 (전체 재집계 없음)
+        get_analytics().apply(result.data[0])
     return result.data[0]["id"] if result.data else None
 
+def get_attachments():
+    return get_attachment_store(
+        attachment_conf.get("root", "saved_images"),
+        int(attachment_conf.get("thumb_size", 320)),
+    )
+
+def save_record_files(record_id, uploaded_files):
+    # 내용 해시로 저장(중복은 한 번만), 썸네일은 백그라운드, 메타데이터는 한 번에 insert
+    with span("files.save"):
+        saved = get_attachments().save_all(uploaded_files)
+    rows = [
+        {
+            "record_id": record_id,
+            "caregiver_name": st.session_state.caregiver_name,
+            "filename": item["filename"],
+            "file_path": item["file_path"],
+        }
+        for item in saved
+    ]
+    store = get_local_writes()
+    with span("db.record_files"):
+        if store is not None:
+            # record_id 는 부모 기록이 올라간 뒤 동기화 스레드가 채운다
+            for row in rows:
+                row.pop("record_id")
+            store.add_many("record_files", rows, depends_on=record_id)
+        else:
+            supabase_client.table("record_files").insert(rows).execute()
+
+def pending_records(start, end):
+    # 로컬에만 있고 아직 올라가지 않은 기록 (최근 것이 앞)
+    store = get_local_writes()
+    if store is None:
+        return []
+    return store.pending("daily_records", "record_date", start, end)[::-1]
+
 def get_monthly_records(year, month):
-    start = f"{year}-{month:02d}-01"
-    end_year, end_month = (year + 1, 1) if month == 12 else (year, month + 1)
-    end = f"{end_year}-{end_month:02d}-01"
-    result = supabase_client.table("daily_records").select("*").gte("record_date", start).lt("record_date", end).execute()
-    return result.data
+    with span("db.monthly_records"):
+        return pending_records(*month_range(year, month)) + get_records_cache().get_month(year, month)
 
 def get_date_record(record_date):
-    result = supabase_client.table("daily_records").select("*").eq("record_date", str(record_date)).order("created_at", desc=True).execute()
-    return result.data
+    # 같은 달 데이터에서 골라내므로 추가 조회 없음
+    with span("db.date_record"):
+        local = pending_records(str(record_date), str(record_date + timedelta(days=1)))
+        return local + get_records_cache().get_day(record_date)
 
-def get_all_records():
-    result = supabase_client.table("daily_records").select("*").order("record_date", desc=True).execute()
+LOG_PAGE_SIZE = 20
+LOG_REFRESH_SECONDS = 60
+LOG_COLUMNS = "id, record_date, created_at, caregiver_name, pain_score, has_files"
+
+def get_records_page(cursor=None, limit=LOG_PAGE_SIZE):
+    # (record_date, created_at) 키셋 페이지네이션. 목록에 필요한 컬럼만 읽는다
+    query = supabase_client.table("daily_records").select(LOG_COLUMNS)
+    if cursor is not None:
+        record_date, created_at = cursor
+        query = query.or_(
+            f'record_date.lt.{record_date},'
+            f'and(record_date.eq.{record_date},created_at.lt."{created_at}")'
+        )
+    result = query.order("record_date", desc=True).order("created_at", desc=True) \
+        .limit(limit).execute()
     return result.data
 
+def get_record_text(record_id):
+    result = supabase_client.table("daily_records").select("condition_text") \
+        .eq("id", record_id).limit(1).execute()
+    return (result.data[0].get("condition_text") if result.data else None) or ""
+
+def load_more_records():
+    if st.session_state.log_cursor is None:
+        st.session_state.log_loaded_at = time.time()
+    rows = get_records_page(st.session_state.log_cursor)
+    st.session_state.log_rows.extend(rows)
+    if rows:
+        st.session_state.log_cursor = (rows[-1]["record_date"], rows[-1]["created_at"])
+    st.session_state.log_has_more = len(rows) == LOG_PAGE_SIZE
+
+def reset_log_pages():
+    st.session_state.log_rows = []
+    st.session_state.log_cursor = None
+    st.session_state.log_has_more = True
+    st.session_state.log_texts = {}
+
+def get_exporter():
+    return get_report_exporter(
+        report_export_conf.get("font_path", ""),
+        report_export_conf.get("cache_dir", ".cache/exports"),
+        float(report_export_conf.get("max_age_days", 30)),
+        float(report_export_conf.get("max_mb", 200)),
+    )
+
 def pain_icon(score):
     if score is None:
         return "⬜"
@@ -125,20 +357,223 @@ def pain_icon(score):
         return "🟡"
     return "🔴"
 
-def send_chat_message(user_input):
+def get_cached_answer_store(user_input):
+    # 선택 기능: secrets 의 [answer_cache] enabled = true 일 때만, 응급성 메시지는 제외
+    if not answer_cache_conf.get("enabled") or mentions_emergency(user_input):
+        return None
+    # 앞 대화가 있으면 후속 질문일 수 있어 캐시하지 않는다 (키에 대화 맥락이 없다)
+    if any(m["role"] == "assistant" for m in st.session_state.messages):
+        return None
+    return get_answer_cache(
+        supabase_url, supabase_key,
+        float(answer_cache_conf.get("threshold", 0.95)),
+        float(answer_cache_conf.get("ttl_minutes", 60)),
+    )
+
+def chat_models():
+    # 선택 기능: [router] enabled = true 일 때만 빠른 모델을 쓴다. 아니면 모든 요청이 큰 모델로 간다
+    large = router_conf.get("large_model", LARGE_MODEL)
+    if not router_conf.get("enabled", False):
+        return large, large
+    return router_conf.get("fast_model", FAST_MODEL), large
+
+def get_router_stats():
+    return get_route_stats(router_conf.get("log_path", ""))
+
+def route_turn(user_input, context, flags):
+    fast, large = chat_models()
+    route = route_chat(
+        user_input, context, flags, fast, large,
+        int(router_conf.get("long_message_chars", 200)),
+        int(router_conf.get("long_context_chars", 3000)),
+    )
+    if fast == large or not router_conf.get("escalate", True):
+        route["escalate_to"] = None
+    return route
+
+def record_chat_route(route_name, model, messages, answer, escalated=False):
+    metrics = st.session_state.get("chat_metrics") or {}
+    get_router_stats().record(
+        route_name, model, metrics.get("total", 0.0), metrics.get("ttft"),
+        prompt_tokens(messages), estimate_tokens(answer), escalated,
+    )
+
+def stream_completion(messages, placeholder, model=LARGE_MODEL):
+    started = time.perf_counter()
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=0.2,
+        stream=True,
+        timeout=stage_timeout("completion"),
+    )
+    parts = []
+    ttft = None
+    last_render = 0.0
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        now = time.perf_counter()
+        if ttft is None:
+            ttft = now - started
+        parts.append(delta)
+        # 토큰마다 다시 그리지 않고 50ms 단위로 묶어서 갱신
+        if now - last_render > 0.05:
+            placeholder.markdown("".join(parts) + "▌")
+            last_render = now
+    full_response = "".join(parts)
+    placeholder.markdown(full_response)
+    st.session_state.chat_metrics = {
+        "ttft": ttft,
+        "total": time.perf_counter() - started,
+    }
+    return full_response
+
+def complete_chat(messages, placeholder=None, model=LARGE_MODEL):
+    with span("openai.chat_completion"):
+        return _complete_chat(messages, placeholder, model)
+
+def _complete_chat(messages, placeholder=None, model=LARGE_MODEL):
+    if placeholder is not None and chat_conf.get("streaming", True):
+        try:
+            return stream_completion(messages, placeholder, model)
+        except Exception:
+            # 스트리밍 실패 시 일반 호출로 대체
+            placeholder.empty()
+    started = time.perf_counter()
+    response = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=0.2,
+        timeout=stage_timeout("completion"),
+    )
+    elapsed = time.perf_counter() - started
+    st.session_state.chat_metrics = {"ttft": elapsed, "total": elapsed}
+    return response.choices[0].message.content
+
+def stage_timeout(stage):
+    # 채팅 턴 단계별 제한 시간(초). [chat] retrieval_timeout / summary_timeout / completion_timeout
+    # (검색 워커 수는 [chat] retrieval_workers, 기본 4)
+    defaults = {"retrieval": 4.0, "summary": 15.0, "completion": 60.0}
+    return float(chat_conf.get(f"{stage}_timeout", defaults[stage]))
+
+def get_history_compactor():
+    summary_client = client.with_options(timeout=stage_timeout("summary"))
+    return HistoryCompactor(
+        make_summarizer(summary_client, chat_conf.get("summary_model", "gpt-4o-mini")),
+        budget_tokens=int(chat_conf.get("history_budget_tokens", 6000)),
+        keep_recent=int(chat_conf.get("keep_recent_messages", 6)),
+    )
+
+def compact_history():
+    # 토큰 예산을 넘으면 오래된 대화를 요약에 접는다 (검색과 동시에 스크립트 스레드에서 실행)
+    try:
+        get_history_compactor().compact(st.session_state.messages, st.session_state.history_state)
+    except Exception:
+        # 요약 실패 시 이번 턴은 접지 않고 그대로 보낸다
+        pass
+
+def build_chat_prompt(context):
+    # 고정 앞부분(시스템 프롬프트 + 요약) + 최근 대화, 참고자료는 마지막 질문 바로 앞
+    return get_history_compactor().build(
+        st.session_state.messages, st.session_state.history_state, context
+    )
+
+def fetch_turn_context(user_input, need_vector, profile=None):
+    # 워커 스레드에서 실행: st.* 를 부르지 않는다. span 은 profile(호출한 재실행)에 붙인다
+    with profiler.attach(profile), span("chat.fetch_context"):
+        query_vector = None
+        if need_vector:
+            try:
+                query_vector = embed_query(user_input)
+            except Exception:
+                pass
+        return query_vector, retrieve_context(user_input, query_vector=query_vector)
+
+def submit_turn_context(user_input, need_vector):
+    # 검색 전용 풀에 넣는다. 멈춘 검색이 자리를 다 차지하고 있으면 None (이번 턴은 검색 없이)
+    executor, slots = get_retrieval_pool(int(chat_conf.get("retrieval_workers", 4)))
+    if not slots.acquire(blocking=False):
+        return None
+
+    def run(profile):
+        try:
+            return fetch_turn_context(user_input, need_vector, profile)
+        finally:
+            slots.release()
+
+    try:
+        return executor.submit(run, profiler.capture())
+    except Exception:
+        slots.release()
+        raise
+
+def send_chat_message(user_input, container=None):
+    with span("chat_turn"):
+        _send_chat_message(user_input, container)
+
+def _send_chat_message(user_input, container=None):
+    # 네트워크 호출 전에 로컬 규칙으로 응급 신호부터 본다 (수십 µs)
+    with span("chat.red_flags"):
+        flags = detect_red_flags(user_input)
+    if flags:
+        raise_red_flag_alert(flags, "채팅 메시지")
+    # 사용자 로그는 지연 쓰기 큐에 넣고 바로 돌아온다
     save_log_to_db("user", user_input)
     st.session_state.messages.append({"role": "user", "content": user_input})
+    placeholder = None
+    if container is not None:
+        with container:
+            if flags:
+                render_red_flag_banner(st.session_state.red_flag_alert, dismissible=False)
+            with st.chat_message("user"):
+                st.markdown(user_input)
+            with st.chat_message("assistant"):
+                placeholder = st.empty()
     try:
-        context = retrieve_context(user_input)
-        messages_with_context = list(st.session_state.messages)
-        if context:
-            messages_with_context.insert(1, {"role": "system", "content": context})
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages_with_context,
-            temperature=0.2,
-        )
-        full_response = response.choices[0].message.content
+        executor = get_chat_executor()
+        answer_store = get_cached_answer_store(user_input)
+        # 임베딩 + 벡터 검색은 워커에서, 그동안 스크립트 스레드는 대화 기록을 정리한다
+        pending = submit_turn_context(user_input, answer_store is not None)
+        with span("chat.compact_history"):
+            compact_history()
+        degraded = False
+        with span("chat.wait_context"):
+            try:
+                if pending is None:
+                    raise FutureTimeout
+                query_vector, context = pending.result(timeout=stage_timeout("retrieval"))
+            except FutureTimeout:
+                # 검색이 늦거나 검색 워커가 모두 멈춰 있으면 참고자료 없이 답한다 (워커 결과는 버린다)
+                query_vector, context, degraded = None, "", True
+        if query_vector is None:
+            answer_store = None
+        full_response = None
+        if answer_store is not None:
+            fingerprint = context_fingerprint(context)
+            full_response = answer_store.get(query_vector, fingerprint)
+            if full_response is not None:
+                st.session_state.pop("chat_metrics", None)
+        if full_response is None:
+            messages_with_context = build_chat_prompt(context)
+            # 단순 질의는 빠른 모델, 응급/해석/긴 요청은 큰 모델 (로컬 분류)
+            route = route_turn(user_input, context, flags)
+            full_response = complete_chat(messages_with_context, placeholder, route["model"])
+            escalate = route["escalate_to"] is not None and needs_escalation(full_response)
+            record_chat_route(route["route"], route["model"], messages_with_context, full_response, escalate)
+            if escalate:
+                # 빠른 모델 답이 짧거나 얼버무리면 큰 모델로 다시 묻는다
+                full_response = complete_chat(messages_with_context, placeholder, route["escalate_to"])
+                record_chat_route("chat.escalated", route["escalate_to"], messages_with_context, full_response)
+            st.session_state.chat_metrics["model"] = route["escalate_to"] if escalate else route["model"]
+            st.session_state.chat_metrics["prompt_tokens"] = prompt_tokens(messages_with_context)
+            st.session_state.chat_metrics["summarized"] = st.session_state.history_state.get("upto", 1) - 1
+            st.session_state.chat_metrics["no_context"] = degraded
+            if answer_store is not None:
+                executor.submit(answer_store.put, query_vector, fingerprint, full_response)
         st.session_state.messages.append({"role": "assistant", "content": full_response})
         save_log_to_db("assistant", full_response)
     except Exception as e:
@@ -166,7 +601,12 @@ if not st.session_state.get("logged_in"):
     show_login()
     st.stop()
 
+client = get_openai_client(api_key)
+supabase_client = get_supabase_client(supabase_url, supabase_key)
+
 # ── 5. 세션 상태 초기화 ──────────────────────────────────────────────────────
+if "profiler_session" not in st.session_state:
+    st.session_state.profiler_session = uuid.uuid4().hex[:8]
 if "view" not in st.session_state:
     st.session_state.view = "calendar"
 if "selected_date" not in st.session_state:
@@ -177,10 +617,19 @@ if "cal_month" not in st.session_state:
     st.session_state.cal_month = date.today().month
 if "messages" not in st.session_state:
     st.session_state.messages = [{"role": "system", "content": system_instruction}]
+if "history_state" not in st.session_state:
+    st.session_state.history_state = {"summary": "", "upto": 1}
 if "add_record_mode" not in st.session_state:
     st.session_state.add_record_mode = False
+if "log_rows" not in st.session_state:
+    reset_log_pages()
+
+profiler.begin_rerun(st.session_state.profiler_session, st.session_state.view)
 
 # ── 6. 메인 레이아웃 (3단) ───────────────────────────────────────────────────
+if st.session_state.get("red_flag_alert"):
+    render_red_flag_banner(st.session_state.red_flag_alert)
+
 col_left, col_center, col_right = st.columns([1, 2, 1.5])
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -214,6 +663,13 @@ with col_left:
     if st.button("📋  기록 로그", use_container_width=True,
                  type="primary" if st.session_state.view == "log" else "secondary"):
         st.session_state.view = "log"
+        # 다른 보호자가 그사이 남긴 기록이 보이도록 들어올 때마다 첫 페이지부터 다시 읽는다
+        reset_log_pages()
+        st.rerun()
+
+    if st.button("📈  통증 추이", use_container_width=True,
+                 type="primary" if st.session_state.view == "trend" else "secondary"):
+        st.session_state.view = "trend"
         st.rerun()
 
     if st.button("📄  회진 레포트", use_container_width=True,
@@ -221,6 +677,26 @@ with col_left:
         st.session_state.view = "report"
         st.rerun()
 
+    local_writes = get_local_writes()
+    if local_writes is not None:
+        sync_stats = local_writes.stats()
+        if sync_stats["failed_rows"]:
+            st.warning(f"⚠️ 동기화 실패 {sync_stats['failed_rows']}건: {sync_stats['failed_row_error']}")
+            if st.button("다시 시도", key="local_store_retry", use_container_width=True):
+                local_writes.retry_failed()
+                st.rerun()
+        if sync_stats["blocked_rows"]:
+            st.caption(f"⚠️ 첨부 {sync_stats['blocked_rows']}건이 기록 id 를 받지 못해 대기 중입니다.")
+        if sync_stats["callback_errors"]:
+            st.caption(f"⚠️ 동기화 후 화면 갱신 실패 {sync_stats['callback_errors']}건: "
+                       f"{sync_stats['last_callback_error']}")
+        if not sync_stats["failed_rows"] and sync_stats["depth"]:
+            backoff = sync_stats["backoff_seconds"]
+            st.caption(
+                f"⏳ 서버 동기화 대기 {sync_stats['depth']}건"
+                + (f" · {backoff:.0f}초 후 재시도" if backoff else "")
+            )
+
     st.divider()
 
     # 채팅 팝업 (st.popover)
@@ -240,6 +716,27 @@ with col_left:
                     else:
                         st.markdown(content)
 
+        metrics = st.session_state.get("chat_metrics")
+        if metrics and metrics.get("ttft") is not None:
+            caption = f"⏱ 첫 응답 {metrics['ttft']:.2f}초 · 전체 {metrics['total']:.2f}초"
+            if metrics.get("prompt_tokens"):
+                caption += f" · 프롬프트 약 {metrics['prompt_tokens']:,}토큰"
+            if metrics.get("summarized"):
+                caption += f" (이전 메시지 {metrics['summarized']}개 요약됨)"
+            if metrics.get("model"):
+                caption += f" · {metrics['model']}"
+            if metrics.get("no_context"):
+                caption += " · 자료 검색 지연으로 참고자료 없이 답변"
+            st.caption(caption)
+        log_stats = get_log_queue().stats()
+        if log_stats["depth"] or log_stats["failed_attempts"]:
+            last_ms = log_stats["last_flush_ms"]
+            st.caption(
+                f"🗂 저장 대기 {log_stats['depth']}건 · 최근 저장 "
+                f"{f'{last_ms:.0f}ms' if last_ms is not None else '-'}"
+                + (f" · 저장 실패 {log_stats['dead_rows']}건" if log_stats.get("dead_rows") else "")
+            )
+
         chat_input = st.text_input(
             "질문", label_visibility="collapsed",
             key="chat_text_input",
@@ -247,11 +744,12 @@ with col_left:
         )
         if st.button("전송", key="chat_send_btn", use_container_width=True, type="primary"):
             if chat_input.strip():
-                send_chat_message(chat_input.strip())
+                send_chat_message(chat_input.strip(), chat_container)
                 st.rerun()
 
     st.divider()
     if st.button("🚪 로그아웃", use_container_width=True):
+        get_log_queue().flush()
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         st.rerun()
@@ -263,72 +761,98 @@ with col_center:
 
     # ── 캘린더 뷰 ────────────────────────────────────────────────────────
     if st.session_state.view == "calendar":
+        use_component = calendar_conf.get("renderer", "component") == "component"
+        if use_component:
+            # 그리드 컴포넌트의 마지막 이벤트를 먼저 반영한 뒤 그린다 (추가 st.rerun 없음)
+            event = st.session_state.get("cal_grid")
+            if event and event.get("nonce") != st.session_state.get("cal_grid_nonce"):
+                st.session_state.cal_grid_nonce = event.get("nonce")
+                if event.get("action") == "select":
+                    st.session_state.selected_date = date.fromisoformat(event["date"])
+                    st.session_state.add_record_mode = False
+                elif event.get("action") in ("prev", "next"):
+                    step = -1 if event["action"] == "prev" else 1
+                    total = st.session_state.cal_year * 12 + st.session_state.cal_month - 1 + step
+                    st.session_state.cal_year, st.session_state.cal_month = divmod(total, 12)
+                    st.session_state.cal_month += 1
+
         year = st.session_state.cal_year
         month = st.session_state.cal_month
 
-        # 월 네비게이션
-        nav1, nav2, nav3 = st.columns([1, 3, 1])
-        with nav1:
-            if st.button("◀", key="prev_month"):
-                if month == 1:
-                    st.session_state.cal_month = 12
-                    st.session_state.cal_year -= 1
-                else:
-                    st.session_state.cal_month -= 1
-                st.rerun()
-        with nav2:
-            st.markdown(f"<h3 style='text-align:center;margin:0'>{year}년 {month}월</h3>",
-                        unsafe_allow_html=True)
-        with nav3:
-            if st.button("▶", key="next_month"):
-                if month == 12:
-                    st.session_state.cal_month = 1
-                    st.session_state.cal_year += 1
-                else:
-                    st.session_state.cal_month += 1
-                st.rerun()
+        if not use_component:
+            # 월 네비게이션
+            nav1, nav2, nav3 = st.columns([1, 3, 1])
+            with nav1:
+                if st.button("◀", key="prev_month"):
+                    if month == 1:
+                        st.session_state.cal_month = 12
+                        st.session_state.cal_year -= 1
+                    else:
+                        st.session_state.cal_month -= 1
+                    st.rerun()
+            with nav2:
+                st.markdown(f"<h3 style='text-align:center;margin:0'>{year}년 {month}월</h3>",
+                            unsafe_allow_html=True)
+            with nav3:
+                if st.button("▶", key="next_month"):
+                    if month == 12:
+                        st.session_state.cal_month = 1
+                        st.session_state.cal_year += 1
+                    else:
+                        st.session_state.cal_month += 1
+                    st.rerun()
 
         # 기록 조회
         monthly_records = get_monthly_records(year, month)
+        get_records_cache().prefetch_adjacent(year, month)
         record_by_date = {r["record_date"]: r for r in monthly_records}
 
-        # 요일 헤더
-        day_headers = st.columns(7)
-        for i, d in enumerate(["일", "월", "화", "수", "목", "금", "토"]):
-            day_headers[i].markdown(
-                f"<div style='text-align:center;font-weight:600;color:#888;padding:6px 0;font-size:13px;'>{d}</div>",
-                unsafe_allow_html=True
-            )
+        if use_component:
+            with span("ui.calendar_grid"):
+                calendar_grid(
+                    year, month, str(st.session_state.selected_date),
+                    month_cells(year, month, record_by_date, pain_icon),
+                    key="cal_grid",
+                )
+        else:
+            with span("ui.calendar_grid"):
+                # 요일 헤더
+                day_headers = st.columns(7)
+                for i, d in enumerate(["일", "월", "화", "수", "목", "금", "토"]):
+                    day_headers[i].markdown(
+                        f"<div style='text-align:center;font-weight:600;color:#888;padding:6px 0;font-size:13px;'>{d}</div>",
+                        unsafe_allow_html=True
+                    )
 
-        # 달력 그리드
-        cal_matrix = calendar.monthcalendar(year, month)
-        for week in cal_matrix:
-            week_cols = st.columns(7)
-            for i, day in enumerate(week):
-                if day == 0:
-                    week_cols[i].write("")
-                    continue
-                d = date(year, month, day)
-                date_str = str(d)
-                has_record = date_str in record_by_date
-                is_selected = str(st.session_state.selected_date) == date_str
-                is_today = d == date.today()
-
-                if has_record:
-                    pain = record_by_date[date_str].get("pain_score") or 5
-                    icon = pain_icon(pain)
-                    label = f"{day}\n{icon}"
-                elif is_today:
-                    label = f"📌{day}"
-                else:
-                    label = str(day)
+                # 달력 그리드
+                cal_matrix = calendar.Calendar(calendar.SUNDAY).monthdayscalendar(year, month)
+                for week in cal_matrix:
+                    week_cols = st.columns(7)
+                    for i, day in enumerate(week):
+                        if day == 0:
+                            week_cols[i].write("")
+                            continue
+                        d = date(year, month, day)
+                        date_str = str(d)
+                        has_record = date_str in record_by_date
+                        is_selected = str(st.session_state.selected_date) == date_str
+                        is_today = d == date.today()
 
-                btn_type = "primary" if is_selected else "secondary"
-                if week_cols[i].button(label, key=f"cal_{date_str}",
-                                       use_container_width=True, type=btn_type):
-                    st.session_state.selected_date = d
-                    st.session_state.add_record_mode = False
-                    st.rerun()
+                        if has_record:
+                            pain = record_by_date[date_str].get("pain_score") or 5
+                            icon = pain_icon(pain)
+                            label = f"{day}\n{icon}"
+                        elif is_today:
+                            label = f"📌{day}"
+                        else:
+                            label = str(day)
+
+                        btn_type = "primary" if is_selected else "secondary"
+                        if week_cols[i].button(label, key=f"cal_{date_str}",
+                                               use_container_width=True, type=btn_type):
+                            st.session_state.selected_date = d
+                            st.session_state.add_record_mode = False
+                            st.rerun()
 
         # 범례
         st.markdown("""
@@ -340,20 +864,87 @@ with col_center:
     # ── 기록 로그 뷰 ─────────────────────────────────────────────────────
     elif st.session_state.view == "log":
         st.markdown("### 📋 전체 기록 로그")
-        all_records = get_all_records()
-        if all_records:
-            for r in all_records:
+        # 첫 페이지만 보고 있으면 잠시 뒤 다시 읽는다 (더 불러온 목록은 그대로 둔다)
+        if (len(st.session_state.log_rows) <= LOG_PAGE_SIZE
+                and time.time() - st.session_state.get("log_loaded_at", 0) > LOG_REFRESH_SECONDS):
+            reset_log_pages()
+        if not st.session_state.log_rows and st.session_state.log_has_more:
+            load_more_records()
+        log_texts = st.session_state.log_texts
+        # 아직 서버에 올라가지 않은 로컬 기록은 날짜 순서에 맞춰 끼워 넣는다
+        log_rows = st.session_state.log_rows
+        local_rows = pending_records(None, None)
+        if local_rows:
+            oldest = log_rows[-1]["record_date"] if log_rows and st.session_state.log_has_more else ""
+            log_rows = sorted(
+                [r for r in local_rows if r["record_date"] >= oldest] + log_rows,
+                key=lambda r: r["record_date"], reverse=True,
+            )
+        if log_rows:
+            for r in log_rows:
                 pain = r.get("pain_score")
+                sync_mark = {"pending": " ⏳", "failed": " ⚠️"}.get(r.get("sync_status"), "")
                 with st.expander(
                     f"{pain_icon(pain)} {r['record_date']} — {r['caregiver_name']} "
-                    f"(통증: {pain if pain else '-'}/10)"
+                    f"(통증: {pain if pain else '-'}/10){sync_mark}"
                 ):
-                    st.markdown(r.get("condition_text") or "_텍스트 기록 없음_")
+                    # 본문은 펼쳐서 요청할 때만 불러온다 (로컬 기록은 본문이 이미 있다)
+                    if r["id"] is None:
+                        st.markdown(r.get("condition_text") or "_텍스트 기록 없음_")
+                        st.caption("⚠️ 동기화 실패" if r["sync_status"] == "failed" else "⏳ 동기화 대기 중")
+                    elif r["id"] in log_texts:
+                        st.markdown(log_texts[r["id"]] or "_텍스트 기록 없음_")
+                    elif st.button("내용 보기", key=f"log_text_{r['id']}"):
+                        log_texts[r["id"]] = get_record_text(r["id"])
+                        st.rerun()
                     if r.get("has_files"):
                         st.caption("📎 파일 첨부됨")
+            if st.session_state.log_has_more:
+                if st.button("더 보기", key="log_more", use_container_width=True):
+                    load_more_records()
+                    st.rerun()
         else:
             st.info("아직 기록이 없습니다.")
 
+    # ── 통증 추이 뷰 ─────────────────────────────────────────────────────
+    elif st.session_state.view == "trend":
+        st.markdown("### 📈 통증 추이")
+        analytics = get_analytics()
+        with span("analytics.sync"):
+            try:
+                analytics.sync()
+            except Exception as e:
+                st.warning(f"새 기록을 집계에 반영하지 못했습니다: {e}")
+        periods = {"최근 30일": 30, "최근 90일": 90, "최근 1년": 365, "전체": None}
+        period = st.radio("기간", list(periods), index=1, horizontal=True,
+                          label_visibility="collapsed", key="trend_period")
+        days = periods[period]
+        start = date.today() - timedelta(days=days - 1) if days else None
+        end = date.today() if days else None
+        with span("analytics.series"):
+            series = analytics.series(start, end)
+        if not series["entries"].sum():
+            st.info("이 기간에는 기록이 없습니다.")
+        else:
+            with span("analytics.figure"):
+                fig, changed = trend_figure(
+                    series,
+                    int(analytics_conf.get("rolling_days", 7)),
+                    int(analytics_conf.get("max_points", 365)),
+                    float(analytics_conf.get("change_threshold", 1.5)),
+                )
+            scored = series["mean"][~np.isnan(series["mean"])]
+            m1, m2, m3 = st.columns(3)
+            m1.metric("평균 통증", f"{scored.mean():.1f}" if scored.size else "-")
+            m2.metric("최고 통증", f"{np.nanmax(series['max']):.0f}" if scored.size else "-")
+            m3.metric("기록 수", f"{int(series['entries'].sum())}건")
+            st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
+            if len(changed):
+                st.caption("🔷 통증 수준이 바뀐 시점: " + ", ".join(str(d) for d in changed[-5:]))
+            counts = analytics.caregiver_counts(start, end)
+            if counts:
+                st.caption("보호자별 기록: " + " · ".join(f"{name} {n}건" for name, n in counts.items()))
+
     # ── 회진 레포트 뷰 ───────────────────────────────────────────────────
     elif st.session_state.view == "report":
         st.markdown("### 📄 회진 레포트 생성")
@@ -373,87 +964,76 @@ with col_center:
                     .gte("record_date", str(start_date)) \
                     .lte("record_date", str(end_date)) \
                     .order("record_date").execute()
-                records = result.data
+                # 아직 올라가지 않은 로컬 기록도 레포트에 넣는다
+                local_rows = pending_records(str(start_date), str(end_date + timedelta(days=1)))
+                records = sorted(result.data + local_rows, key=lambda r: r["record_date"])
+                if local_rows:
+                    st.caption(f"⏳ 아직 서버에 동기화되지 않은 기록 {len(local_rows)}건을 포함했습니다.")
 
                 if not records:
                     st.warning("해당 기간에 기록이 없습니다.")
                 else:
+                    pname = patient_info.get("name", "환자")
+                    report_store = None
+                    if report_cache_conf.get("enabled", True):
+                        report_store = get_report_cache(
+                            report_cache_conf.get("db_path", ".cache/reports.sqlite3"),
+                            float(report_cache_conf.get("max_age_days", 90)),
+                        )
                     with st.spinner("📊 AI가 레포트를 작성 중입니다..."):
-                        records_text = "\n".join([
-                            f"[{r['record_date']}] 보호자: {r['caregiver_name']}, "
-                            f"통증점수: {r.get('pain_score', '기록없음')}/10\n"
-                            f"{r.get('condition_text', '내용 없음')}"
-                            for r in records
-                        ])
-
-                        pname = patient_info.get("name", "환자")
-                        report_prompt = f"""
-다음은 {pname} 환자의 {start_date}부터 {end_date}까지의 보호자 관찰 기록입니다.
-담당 의사가 회진 시 참고할 수 있도록 핵심 내용을 의학적 관점에서 요약해주세요.
-
-[관찰 기록]
-{records_text}
-
-다음 형식으로 작성해 주세요:
-1. 통증 패턴 요약 (평균 점수, 악화 시간대 등)
-2. 주요 증상 변화
-3. 보호자가 특별히 우려한 사항
-4. 의사에게 건의할 사항"""
-
-                        response = client.chat.completions.create(
-                            model="gpt-4o",
-                            messages=[
-                                {"role": "system", "content": "당신은 암 환자의 담당 의사를 보조하는 임상 코디네이터입니다."},
-                                {"role": "user", "content": report_prompt}
-                            ],
-                            temperature=0.3,
+                        fast_model, large_model = chat_models()
+                        report_text, report_info = generate_report(
+                            client, records, pname, start_date, end_date, cache=report_store,
+                            window_model=fast_model, final_model=large_model,
+                            record=get_router_stats().record,
                         )
-                        report_text = response.choices[0].message.content
+                    st.session_state.report = {
+                        "key": report_info["key"], "info": report_info, "text": report_text,
+                        "pname": pname, "start": str(start_date), "end": str(end_date),
+                    }
+                    # TXT/PDF 는 백그라운드에서 렌더링하고 레포트 해시로 캐시한다
+                    get_exporter().submit(report_info["key"], pname, start_date, end_date, report_text)
 
-                    st.divider()
-                    st.markdown(report_text)
-                    st.divider()
+        report = st.session_state.get("report")
+        if report:
+            report_info = report["info"]
+            if report_info["cached"]:
+                st.caption("⚡ 같은 기록으로 만든 레포트를 바로 불러왔습니다.")
+            elif report_info["reused_windows"]:
+                st.caption(
+                    f"♻️ 구간 요약 {report_info['windows']}개 중 "
+                    f"{report_info['reused_windows']}개를 재사용했습니다."
+                )
 
-                    # TXT 다운로드
-                    report_content = (
-                        f"회진 레포트\n기간: {start_date} ~ {end_date}\n"
-                        f"환자: {pname}\n\n{report_text}"
-                    )
-                    st.download_button(
-                        "📥 레포트 다운로드 (TXT)",
-                        data=report_content.encode("utf-8"),
-                        file_name=f"회진레포트_{start_date}_{end_date}.txt",
-                        mime="text/plain",
-                        use_container_width=True
-                    )
+            st.divider()
+            st.markdown(report["text"])
+            st.divider()
 
-                    # PDF 다운로드 (한글 폰트 파일 있을 때만)
-                    try:
-                        from fpdf import FPDF
-                        pdf = FPDF()
-                        pdf.add_page()
-                        font_path = os.path.join(os.path.dirname(__file__), "NanumGothic.ttf")
-                        if os.path.exists(font_path):
-                            pdf.add_font("NanumGothic", fname=font_path)
-                            pdf.set_font("NanumGothic", size=12)
-                        else:
-                            pdf.set_font("Helvetica", size=12)
-                        pdf.cell(0, 10, f"Ward Round Report - {pname}", ln=True)
-                        pdf.cell(0, 10, f"Period: {start_date} ~ {end_date}", ln=True)
-                        pdf.ln(4)
-                        for line in report_text.split("\n"):
-                            safe_line = line.encode("latin-1", "replace").decode("latin-1")
-                            pdf.multi_cell(0, 8, safe_line)
-                        pdf_bytes = bytes(pdf.output())
-                        st.download_button(
-                            "📥 PDF 다운로드",
-                            data=pdf_bytes,
-                            file_name=f"report_{start_date}_{end_date}.pdf",
-                            mime="application/pdf",
-                            use_container_width=True
-                        )
-                    except Exception:
-                        pass
+            # TXT 는 바로 만들고, PDF 는 워커가 끝났을 때만 버튼을 보인다 (기다리지 않는다)
+            pdf_job = get_exporter().submit(
+                report["key"], report["pname"], report["start"], report["end"], report["text"]
+            )
+            st.download_button(
+                "📥 레포트 다운로드 (TXT)",
+                data=render_txt(report["pname"], report["start"], report["end"], report["text"]),
+                file_name=f"회진레포트_{report['start']}_{report['end']}.txt",
+                mime="text/plain",
+                use_container_width=True
+            )
+            export = pdf_job.result() if pdf_job.done() else None
+            if export is None:
+                st.caption("📄 PDF 를 준비 중입니다...")
+                st.button("🔄 PDF 준비 확인", key="report_pdf_refresh", use_container_width=True)
+            elif export["pdf"] is not None:
+                st.download_button(
+                    "📥 PDF 다운로드",
+                    data=export["pdf"],
+                    file_name=f"report_{report['start']}_{report['end']}.pdf",
+                    mime="application/pdf",
+                    use_container_width=True
+                )
+            else:
+                st.error(export["error"])
 
 # ════════════════════════════════════════════════════════════════════════════
 # 우측: 날짜별 기록 입력 / 조회
@@ -481,6 +1061,10 @@ with col_right:
                     )
                 if rec.get("has_files"):
                     st.caption("📎 파일 첨부됨")
+                if rec.get("sync_status") == "pending":
+                    st.caption("⏳ 동기화 대기 중")
+                elif rec.get("sync_status") == "failed":
+                    st.caption("⚠️ 동기화 실패")
                 st.divider()
             if st.button("+ 추가 기록 작성", use_container_width=True):
                 st.session_state.add_record_mode = True
@@ -517,19 +1101,56 @@ with col_right:
                         has_files
                     )
                     if record_id and uploaded_files:
-                        if not os.path.exists("saved_images"):
-                            os.makedirs("saved_images")
-                        for f in uploaded_files:
-                            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            file_path = os.path.join("saved_images", f"{ts}_{f.name}")
-                            with open(file_path, "wb") as fp:
-                                fp.write(f.getbuffer())
-                            supabase_client.table("record_files").insert({
-                                "record_id": record_id,
-                                "caregiver_name": st.session_state.caregiver_name,
-                                "filename": f.name,
-                                "file_path": file_path
-                            }).execute()
+                        save_record_files(record_id, uploaded_files)
+                    reset_log_pages()
                     st.success("✅ 기록이 저장되었습니다!")
                     st.session_state.add_record_mode = False
                     st.rerun()
+
+# ════════════════════════════════════════════════════════════════════════════
+# 관리자용 프로파일러 패널 (사이드바)
+# ════════════════════════════════════════════════════════════════════════════
+# 보호자 이름은 로그인 때 아무나 입력하므로, 공유 비밀번호와 별개인 [profiler] admin_password 로 연다
+admin_secret = profiler_conf.get("admin_password", "")
+if admin_secret and not st.session_state.get("is_admin"):
+    with st.sidebar:
+        admin_input = st.text_input("관리자 비밀번호", type="password", key="admin_password_input")
+        if admin_input and hmac.compare_digest(admin_input.encode("utf-8"), admin_secret.encode("utf-8")):
+            st.session_state.is_admin = True
+            st.rerun()
+is_admin = bool(admin_secret) and st.session_state.get("is_admin", False)
+
+if profiler.enabled and is_admin:
+    with st.sidebar:
+        st.markdown("#### ⏱ 재실행 프로파일")
+        reruns = profiler.recent()
+        st.download_button(
+            "📥 JSONL 내보내기",
+            data=profiler.to_jsonl().encode("utf-8"),
+            file_name="profile_spans.jsonl",
+            mime="application/jsonl",
+            use_container_width=True,
+            disabled=not reruns,
+        )
+        for rerun in reruns:
+            started = datetime.fromtimestamp(rerun["started_at"]).strftime("%H:%M:%S")
+            st.markdown(
+                f"**{started}** · {rerun['label']} · {rerun['duration_ms']:.0f} ms "
+                f"<span style='color:#999;font-size:11px'>{rerun['rerun_id']}</span>",
+                unsafe_allow_html=True,
+            )
+            if rerun["spans"]:
+                st.code("\n".join(
+                    f"{'  ' * s['depth']}{s['name']:<{32 - 2 * s['depth']}} "
+                    f"{s.get('duration_ms', 0.0):8.1f} ms{' !' + s['error'] if s.get('error') else ''}"
+                    for s in rerun["spans"]
+                ), language=None)
+
+if is_admin:
+    route_rows = get_router_stats().summary()
+    if route_rows:
+        with st.sidebar:
+            st.markdown("#### 🔀 모델 경로별 지연 / 토큰")
+            st.dataframe(route_rows, use_container_width=True, hide_index=True)
+
+profiler.end_rerun()
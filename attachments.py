@@ -0,0 +1,120 @@
+"""
+기록 첨부 파일 저장소 (내용 주소 방식)
+업로드된 파일을 청크 단위로 흘려 쓰면서 SHA-256 을 계산하고, 해시를 파일 이름으로 저장한다.
+
+- 같은 내용은 한 번만 저장된다 (같은 초에 올린 파일끼리 이름이 겹치지도 않는다).
+- 파일 전체를 메모리에 올리지 않는다 (getbuffer() 대신 read(chunk_size) 반복).
+- 이미지 썸네일은 백그라운드 워커가 만든다. Pillow 가 없으면 썸네일만 건너뛴다.
+- record_files 행은 save_all() 이 돌려준 목록을 한 번의 insert 로 넣는다.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+CHUNK_SIZE = 1024 * 1024
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+def make_thumbnail(src_path: str, dst_path: str, size: int):
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        tmp_path = f"{dst_path}.tmp"
+        image.save(tmp_path, "JPEG", quality=80)
+    os.replace(tmp_path, dst_path)
+
+
+class AttachmentStore:
+    def __init__(self, root: str = "saved_images", thumb_size: int = 320,
+                 chunk_size: int = CHUNK_SIZE):
+        self.root = root
+        self.thumb_size = thumb_size
+        self.chunk_size = chunk_size
+        self._thumbs: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+        self._stats = {"saved": 0, "deduplicated": 0, "bytes_written": 0, "thumb_errors": 0}
+        os.makedirs(os.path.join(root, "thumbs"), exist_ok=True)
+
+    def _blob_path(self, digest: str, ext: str) -> str:
+        # 한 디렉터리에 파일이 몰리지 않도록 해시 앞 두 글자로 나눈다
+        return os.path.join(self.root, digest[:2], f"{digest}{ext}")
+
+    def thumbnail_path(self, digest: str) -> str:
+        return os.path.join(self.root, "thumbs", f"{digest}.jpg")
+
+    def save(self, upload, filename: str | None = None) -> dict:
+        """파일 객체(read 가능)를 저장하고 {filename, file_path, sha256, size} 를 돌려준다."""
+        filename = filename or getattr(upload, "name", "upload")
+        ext = os.path.splitext(filename)[1].lower()
+        if hasattr(upload, "seek"):
+            upload.seek(0)
+        digest, size = hashlib.sha256(), 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                while chunk := upload.read(self.chunk_size):
+                    digest.update(chunk)
+                    fp.write(chunk)
+                    size += len(chunk)
+            sha = digest.hexdigest()
+            file_path = self._blob_path(sha, ext)
+            if os.path.exists(file_path):
+                os.remove(tmp_path)
+                stat = "deduplicated"
+            else:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                os.replace(tmp_path, file_path)
+                stat = "saved"
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self._stats[stat] += 1
+            if stat == "saved":
+                self._stats["bytes_written"] += size
+        if ext in IMAGE_EXTENSIONS:
+            self.submit_thumbnail(sha, file_path)
+        return {"filename": filename, "file_path": file_path, "sha256": sha, "size": size}
+
+    def save_all(self, uploads) -> list[dict]:
+        return [self.save(upload) for upload in uploads]
+
+    def _thumbnail(self, digest: str, src_path: str) -> str | None:
+        dst_path = self.thumbnail_path(digest)
+        try:
+            if not os.path.exists(dst_path):
+                make_thumbnail(src_path, dst_path, self.thumb_size)
+            return dst_path
+        except Exception:
+            with self._lock:
+                self._stats["thumb_errors"] += 1
+            return None
+        finally:
+            with self._lock:
+                self._thumbs.pop(digest, None)
+
+    def submit_thumbnail(self, digest: str, src_path: str) -> Future:
+        with self._lock:
+            future = self._thumbs.get(digest)
+            if future is None:
+                future = self._executor.submit(self._thumbnail, digest, src_path)
+                self._thumbs[digest] = future
+            return future
+
+    def thumbnail(self, digest: str) -> str | None:
+        """썸네일이 준비됐으면 경로, 아직이거나 실패했으면 None."""
+        path = self.thumbnail_path(digest)
+        return path if os.path.exists(path) else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "thumbs_pending": len(self._thumbs)}
@@ -0,0 +1,52 @@
+"""
+캘린더 뷰 재실행 시간: 버튼 그리드 vs 그리드 컴포넌트
+사용법: python benchmarks/bench_calendar.py [--records 300] [--reruns 20]
+
+bench_suite 의 가짜 Supabase/OpenAI 로 app.py 캘린더 뷰를 AppTest 로 실행하고,
+[calendar] renderer = "buttons" (이전 방식, 날짜마다 st.button) 와 "component" 의
+첫 렌더 / 재실행 / 날짜 선택 시간을 비교한다. 실제 브라우저의 위젯 diff·레이아웃 비용은
+포함되지 않으므로 서버 쪽 스크립트 시간만 본다.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_suite import click_day, install_fakes, make_app, seed, timed  # noqa: E402
+from fakes import FakeEmbeddings, FakeOpenAI, FakeSupabase  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=300)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--db-latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    url = "https://bench-calendar.local"
+    dbs = {url: FakeSupabase(args.db_latency_ms / 1000)}
+    seed(dbs[url], args.records, dim=8)
+    install_fakes(dbs, FakeOpenAI(), FakeEmbeddings(8))
+    workdir = tempfile.mkdtemp(prefix="bench_calendar_")
+    os.chdir(workdir)
+
+    today = date.today()
+    print(f"{'renderer':>10} {'cold ms':>9} {'rerun ms':>9} {'select ms':>10}")
+    for renderer in ("buttons", "component"):
+        at = make_app(url, "calendar", workdir, renderer)
+        cold = timed(at.run)
+        rerun = statistics.median(timed(at.run) for _ in range(args.reruns))
+        select = statistics.median(
+            timed(lambda: click_day(at, date(today.year, today.month, 1 + i % 28), renderer))
+            for i in range(args.reruns)
+        )
+        print(f"{renderer:>10} {cold:>9.1f} {rerun:>9.1f} {select:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+대용량 문서 적재 시 최대 메모리(RSS) 측정
+사용법: python benchmarks/bench_ingest_memory.py [--pages 300 600 1200] [--keep]
+
+합성 PDF(페이지마다 영문 본문, 외부 폰트 없이 PDF 기본 Helvetica)를 만들고, 모드별로 새 프로세스에서 적재해 최대 RSS 를 잰다.
+  - eager : 기존 방식. loader.load() → split_documents() → 전체 임베딩 → 저장
+  - stream: upload_docs.stream_source(). 페이지 단위 lazy_load, 구간별 임베딩/저장
+OpenAI / Supabase 는 호출하지 않는다 (1536차원 가짜 벡터, 저장은 버림).
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DIM = 1536
+# 한글 폰트가 없는 환경에서도 만들 수 있도록 Latin-1 본문을 쓴다 (분할/임베딩 비용은 글자 수 기준)
+PARAGRAPH = (
+    "During chemotherapy, mouth sores, loss of appetite and nausea are common. If the temperature "
+    "reaches 38 degrees or higher, call the hospital right away, keep drinking fluids and eat "
+    "soft food in small, frequent meals. "
+)
+
+
+class FakeEmbeddings:
+    def embed_documents(self, texts):
+        return [[0.001] * DIM for _ in texts]
+
+
+class FakeQuery:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        class Result:
+            data = []
+        return Result
+
+
+class FakeSupabase:
+    def table(self, name):
+        return FakeQuery()
+
+
+def make_pdf(path, pages):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_font("Helvetica", size=10)
+    for i in range(pages):
+        pdf.add_page()
+        # 문단마다 번호를 달아 청크 본문이 겹치지 않게 한다 (stream 은 같은 본문을 한 번만 저장)
+        pdf.multi_cell(0, 5, f"Page {i + 1}\n" + "".join(f"({i + 1}.{j + 1}) {PARAGRAPH}" for j in range(12)))
+    pdf.output(path)
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 는 KB, macOS 는 바이트 단위
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_eager(path):
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.document_loaders import PyPDFLoader
+
+    docs = PyPDFLoader(path).load()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    chunks = splitter.split_documents(docs)
+    vectors = FakeEmbeddings().embed_documents([c.page_content for c in chunks])
+    rows = [{"content": c.page_content, "metadata": c.metadata, "embedding": v}
+            for c, v in zip(chunks, vectors)]
+    FakeSupabase().table("documents").insert(rows).execute()
+    return len(rows)
+
+
+def run_stream(path):
+    import upload_docs
+
+    upload_docs.touch_documents_marker = lambda: None
+    upload_docs.Progress.add = lambda self, n: setattr(self, "done", self.done + n)
+    result = upload_docs.stream_source(path, FakeEmbeddings(), FakeSupabase())
+    return result["added"]
+
+
+def child(mode, path):
+    t0 = time.perf_counter()
+    chunks = run_eager(path) if mode == "eager" else run_stream(path)
+    print(f"{chunks} {time.perf_counter() - t0:.2f} {peak_rss_mb():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[300, 600, 1200])
+    parser.add_argument("--keep", action="store_true", help="생성한 PDF 를 지우지 않음")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench_ingest_")
+    print(f"{'pages':>6} {'mode':>7} {'chunks':>7} {'seconds':>8} {'peak RSS':>10}")
+    for pages in args.pages:
+        path = os.path.join(workdir, f"synthetic_{pages}.pdf")
+        make_pdf(path, pages)
+        for mode in ("eager", "stream"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, path],
+                cwd=ROOT, check=True, capture_output=True, text=True,
+            ).stdout.split()
+            chunks, seconds, rss = out[-3:]
+            print(f"{pages:>6} {mode:>7} {chunks:>7} {float(seconds):>8.2f} {float(rss):>8.1f}MB")
+        if not args.keep:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+로컬 벡터 인덱스 검색 시간 측정
+사용법: python benchmarks/bench_local_index.py [--docs 1000 5000 20000] [--queries 1000]
+
+무작위 1536차원 임베딩으로 LocalVectorIndex 를 채우고 top-3 검색 1회당 시간을 잰다.
+(비교 대상인 match_documents RPC 는 네트워크 왕복이라 보통 수십~수백 ms 이다.)
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from local_index import LocalVectorIndex  # noqa: E402
+
+DIM = 1536
+
+
+def build_index(n, rng):
+    vectors = rng.standard_normal((n, DIM), dtype=np.float32)
+    rows = [{"id": f"doc-{i}", "content": f"문서 {i}", "embedding": vectors[i].tolist()}
+            for i in range(n)]
+    index = LocalVectorIndex(lambda: [r["id"] for r in rows], lambda ids: rows,
+                             path=None, max_age_seconds=3600)
+    index.sync()
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, DIM), dtype=np.float32)
+    print(f"{'docs':>7} {'sync ms':>9} {'search µs':>10}")
+    for n in args.docs:
+        index = build_index(n, rng)
+        t0 = time.perf_counter()
+        for q in queries:
+            index.search(q, k=3)
+        per_query = (time.perf_counter() - t0) / args.queries
+        print(f"{n:>7} {index.last_sync_seconds * 1000:>9.1f} {per_query * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+응급 신호 감지기 정확도 + 메시지당 비용
+사용법: python benchmarks/bench_red_flags.py [--repeat 2000]
+
+benchmarks/red_flag_corpus.jsonl (문장 → 기대 규칙 목록) 로 규칙별 정밀도/재현율을 보고
+틀린 문장을 출력한 뒤, 코퍼스 전체를 repeat 번 돌려 메시지 1건당 평균 µs 를 잰다.
+틀린 문장이 있으면 종료 코드 1.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from red_flags import LABELS, detect  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "red_flag_corpus.jsonl")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--corpus", default=CORPUS)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as fp:
+        corpus = [json.loads(line) for line in fp if line.strip()]
+
+    counts = {rule: {"tp": 0, "fp": 0, "fn": 0} for rule in LABELS}
+    mistakes = 0
+    for case in corpus:
+        got = {f["rule"] for f in detect(case["text"])}
+        expected = set(case["flags"])
+        for rule in LABELS:
+            if rule in got and rule in expected:
+                counts[rule]["tp"] += 1
+            elif rule in got:
+                counts[rule]["fp"] += 1
+            elif rule in expected:
+                counts[rule]["fn"] += 1
+        if got != expected:
+            mistakes += 1
+            print(f"  ✗ {case['text']}  기대 {sorted(expected)} / 결과 {sorted(got)}")
+
+    print(f"{'rule':>14} {'precision':>10} {'recall':>8}")
+    for rule, c in counts.items():
+        precision = c["tp"] / (c["tp"] + c["fp"]) if c["tp"] + c["fp"] else 1.0
+        recall = c["tp"] / (c["tp"] + c["fn"]) if c["tp"] + c["fn"] else 1.0
+        print(f"{rule:>14} {precision:>10.2f} {recall:>8.2f}")
+
+    texts = [case["text"] for case in corpus]
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        for text in texts:
+            detect(text)
+    per_message = (time.perf_counter() - t0) / (args.repeat * len(texts))
+    print(f"{len(texts)}문장 × {args.repeat}회: 메시지당 {per_message * 1e6:.1f} µs")
+    sys.exit(1 if mistakes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+app.py 시작/재실행 비용 측정
+사용법: python benchmarks/bench_startup.py [--runs 5] [--reruns 50]
+
+1) 콜드 스타트: 새 프로세스에서 로그인 화면까지 필요한 임포트 시간
+   - before: streamlit + openai + supabase + langchain (기존 app.py 최상단 임포트)
+   - after : 지금 app.py 최상단 임포트 전부 (app.py 를 파싱해서 뽑는다.
+             클라이언트/langchain 은 resources 안에서 지연 임포트)
+2) 재실행: 매 rerun 마다 클라이언트를 새로 만드는 비용 vs resources 캐시 조회 비용
+네트워크 호출은 하지 않는다 (클라이언트 생성만 측정).
+"""
+
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FAKE_KEY = "sk-bench"
+FAKE_URL = "https://bench.supabase.co"
+FAKE_SUPABASE_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.bench"
+
+BEFORE_IMPORTS = (
+    "import streamlit, openai, supabase, langchain_openai; "
+    "import langchain_community.vectorstores"
+)
+
+
+def app_top_level_imports():
+    # app.py 모듈 최상단의 import 문만 모은다 (함수 안 지연 임포트는 제외)
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(n for n in names if n not in modules)
+    return "import " + ", ".join(modules)
+
+
+def time_cold_import(stmt, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", stmt], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def build_uncached():
+    from openai import OpenAI
+    from supabase import create_client
+    from langchain_openai import OpenAIEmbeddings
+    from langchain_community.vectorstores import SupabaseVectorStore
+
+    client = OpenAI(api_key=FAKE_KEY)
+    supabase_client = create_client(FAKE_URL, FAKE_SUPABASE_KEY)
+    embeddings = OpenAIEmbeddings(openai_api_key=FAKE_KEY, model="text-embedding-3-small")
+    SupabaseVectorStore(client=supabase_client, embedding=embeddings,
+                        table_name="documents", query_name="match_documents")
+    return client
+
+
+def build_cached():
+    from resources import get_openai_client, get_supabase_client, get_vector_store
+
+    client = get_openai_client(FAKE_KEY)
+    get_supabase_client(FAKE_URL, FAKE_SUPABASE_KEY)
+    get_vector_store(FAKE_KEY, FAKE_URL, FAKE_SUPABASE_KEY)
+    return client
+
+
+def time_reruns(fn, reruns):
+    fn()  # 임포트 비용 제외
+    t0 = time.perf_counter()
+    for _ in range(reruns):
+        fn()
+    return (time.perf_counter() - t0) / reruns
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--reruns", type=int, default=50)
+    args = parser.parse_args()
+
+    before = time_cold_import(BEFORE_IMPORTS, args.runs)
+    after = time_cold_import(app_top_level_imports(), args.runs)
+    print(f"콜드 스타트 임포트 (중앙값, {args.runs}회)")
+    print(f"  before: {before * 1000:8.1f} ms")
+    print(f"  after : {after * 1000:8.1f} ms  ({before / after:.1f}x)")
+
+    uncached = time_reruns(build_uncached, args.reruns)
+    cached = time_reruns(build_cached, args.reruns)
+    print(f"재실행당 클라이언트 준비 비용 (평균, {args.reruns}회)")
+    print(f"  before: {uncached * 1000:8.3f} ms")
+    print(f"  after : {cached * 1000:8.3f} ms  ({uncached / cached:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
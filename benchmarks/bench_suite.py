@@ -0,0 +1,258 @@
+"""
+오프라인 성능 벤치마크 모음
+사용법:
+  python benchmarks/bench_suite.py [--scales 10 100 1000 10000 100000] [--out bench.json]
+  (--out 기본값은 .cache/bench_results.json — git 에서 무시된다)
+  python benchmarks/bench_suite.py --compare old.json new.json [--threshold 10]
+
+Supabase / OpenAI 는 benchmarks/fakes.py 의 프로세스 내 대역으로 바꾸고
+(--db-latency-ms, --ttft-ms, --tps, --embed-latency-ms 로 인위적 지연 설정),
+규모별로 daily_records / chat_logs / documents 를 채운 뒤 다음을 잰다.
+
+  calendar_cold_ms / calendar_click_ms  캘린더 첫 렌더와 날짜 클릭 재실행 (--calendar-renderer)
+  log_rerun_ms                          기록 로그 뷰 재실행
+  report_cold_ms / report_warm_ms       90일 회진 레포트 (처음 / 같은 요청 반복)
+  chat_turn_ms                          채팅 한 턴 (전송 → 응답 저장)
+  ingest_chunks_per_s                   upload_docs.stream_source 적재 처리량
+
+UI 지표는 streamlit.testing 의 AppTest 로 app.py 를 그대로 실행해서 잰다.
+결과는 버전(git) 정보와 함께 JSON 으로 저장하고, --compare 로 두 결과를 비교한다.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeEmbeddings, FakeOpenAI, FakeSupabase, FakeVectorStore, fake_vector  # noqa: E402
+
+CAREGIVERS = ["엄마", "아빠", "큰딸", "간병인"]
+CONDITION = "아침에 미열이 있었고 식사는 반 공기 정도 드셨어요. 오후에는 통증이 조금 줄었습니다. "
+DOC_TEXT = "항암 치료 중 발열은 호중구 감소증의 신호일 수 있으므로 38도 이상이면 즉시 병원에 연락하세요. "
+# 지표 이름 → 값이 클수록 좋은지
+HIGHER_IS_BETTER = {"ingest_chunks_per_s"}
+
+
+def seed(db: FakeSupabase, scale: int, dim: int):
+    today = date.today()
+    days = max(1, scale // 3)
+    records = []
+    for i in range(scale):
+        d = today - timedelta(days=i % days)
+        records.append({
+            "record_date": str(d),
+            "created_at": datetime(d.year, d.month, d.day, 8 + i % 12, tzinfo=timezone.utc).isoformat(),
+            "caregiver_name": CAREGIVERS[i % len(CAREGIVERS)],
+            "condition_text": CONDITION * (1 + i % 3),
+            "pain_score": 1 + (i * 7) % 10,
+            "has_files": False,
+        })
+    db.seed("daily_records", records)
+    db.seed("sessions", [{"id": f"session-{i}"} for i in range(max(1, scale // 20))])
+    db.seed("chat_logs", [
+        {"session_id": f"session-{i % max(1, scale // 20)}",
+         "role": "user" if i % 2 == 0 else "assistant",
+         "content": CONDITION}
+        for i in range(scale)
+    ])
+    db.seed("documents", [
+        {"id": f"doc-{i}", "content": f"{DOC_TEXT}({i})",
+         "metadata": {"source": f"guide-{i // 50}.pdf"},
+         "embedding": fake_vector(f"doc-{i}", dim)}
+        for i in range(scale)
+    ])
+
+
+def install_fakes(dbs: dict, openai_client, embeddings):
+    # app.py 는 실행될 때마다 resources 에서 함수를 가져오므로 모듈 속성을 바꾸면 된다
+    import resources
+
+    resources.get_supabase_client = lambda url, key: dbs[url]
+    resources.get_openai_client = lambda api_key: openai_client
+    resources.get_vector_store = lambda api_key, url, key: FakeVectorStore(dbs[url], embeddings)
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def make_app(url: str, view: str, workdir: str, renderer: str = "component"):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+    at.secrets["OPENAI_API_KEY"] = "sk-bench"
+    at.secrets["supabase"] = {"url": url, "key": "bench"}
+    at.secrets["admin_password"] = "bench"
+    at.secrets["embedding_cache"] = {"db_path": ""}
+    at.secrets["report_cache"] = {"db_path": os.path.join(workdir, f"reports-{abs(hash(url))}.sqlite3")}
+    at.secrets["report_export"] = {"cache_dir": os.path.join(workdir, "exports")}
+    at.secrets["calendar"] = {"renderer": renderer}
+    at.session_state["logged_in"] = True
+    at.session_state["caregiver_name"] = "벤치"
+    at.session_state["view"] = view
+    return at
+
+
+def click_day(at, d: date, renderer: str):
+    if renderer == "buttons":
+        at.button(key=f"cal_{d}").click().run()
+    else:
+        # 그리드 컴포넌트는 AppTest 에서 클릭할 수 없으므로 클릭이 남기는 상태를 그대로 넣는다
+        at.session_state["selected_date"] = d
+        at.run()
+
+
+def bench_ui(url: str, workdir: str, clicks: int, renderer: str = "component") -> dict:
+    results = {}
+
+    at = make_app(url, "calendar", workdir, renderer)
+    results["calendar_cold_ms"] = timed(at.run)
+    today = date.today()
+    samples = []
+    for day in range(1, clicks + 1):
+        d = date(today.year, today.month, min(day, 28))
+        samples.append(timed(lambda: click_day(at, d, renderer)))
+    results["calendar_click_ms"] = statistics.median(samples)
+
+    at = make_app(url, "log", workdir)
+    at.run()
+    results["log_rerun_ms"] = statistics.median(timed(at.run) for _ in range(5))
+
+    at = make_app(url, "report", workdir)
+    at.run()
+    at.date_input(key="report_date_range").set_value((today - timedelta(days=90), today))
+    generate = next(b for b in at.button if b.label.startswith("🤖"))
+    results["report_cold_ms"] = timed(lambda: generate.click().run())
+    generate = next(b for b in at.button if b.label.startswith("🤖"))
+    results["report_warm_ms"] = timed(lambda: generate.click().run())
+
+    at = make_app(url, "calendar", workdir, renderer)
+    at.run()
+    at.text_input(key="chat_text_input").input("항암 중에 열이 조금 나는데 괜찮을까요")
+    results["chat_turn_ms"] = timed(lambda: at.button(key="chat_send_btn").click().run())
+    return results
+
+
+def bench_ingest(scale: int, dim: int, latency: float) -> dict:
+    import upload_docs
+
+    db = FakeSupabase(latency)
+    embeddings = FakeEmbeddings(dim, latency)
+    upload_docs.iter_chunks = lambda source: (
+        (f"{DOC_TEXT}[{i}]", {"page": i // 4}) for i in range(scale)
+    )
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # 배치마다 찍는 진행률은 버린다
+        result = upload_docs.stream_source("bench.pdf", embeddings, db)
+    elapsed = time.perf_counter() - t0
+    return {"ingest_chunks_per_s": result["added"] / elapsed if elapsed else None}
+
+
+def git_version() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args) -> dict:
+    latency = args.db_latency_ms / 1000
+    openai_client = FakeOpenAI(args.ttft_ms / 1000, args.tps, args.dim)
+    embeddings = FakeEmbeddings(args.dim, args.embed_latency_ms / 1000)
+    dbs = {}
+    install_fakes(dbs, openai_client, embeddings)
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    os.chdir(workdir)  # .cache/ 산출물이 저장소를 더럽히지 않도록
+
+    results = {}
+    for scale in args.scales:
+        url = f"https://bench-{scale}.local"
+        dbs[url] = FakeSupabase(latency)
+        t0 = time.perf_counter()
+        seed(dbs[url], scale, args.dim)
+        print(f"▶ scale {scale:,} (seed {time.perf_counter() - t0:.1f}s)")
+        metrics = {}
+        try:
+            metrics.update(bench_ui(url, workdir, args.clicks, args.calendar_renderer))
+        except ImportError as e:
+            print(f"  UI 지표 생략: {e}")
+        metrics.update(bench_ingest(scale, args.dim, latency))
+        metrics["db_requests"] = dbs[url].requests
+        for name, value in metrics.items():
+            print(f"  {name:<22} {value:12.2f}" if isinstance(value, float) else f"  {name:<22} {value:>12}")
+        results[str(scale)] = metrics
+
+    return {
+        "version": git_version(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("compare", "out")},
+        "results": results,
+    }
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    with open(old_path, encoding="utf-8") as fp:
+        old = json.load(fp)
+    with open(new_path, encoding="utf-8") as fp:
+        new = json.load(fp)
+    print(f"{old['version']} → {new['version']}")
+    regressions = 0
+    for scale, metrics in new["results"].items():
+        before = old["results"].get(scale, {})
+        for name, value in metrics.items():
+            prev = before.get(name)
+            if not isinstance(value, (int, float)) or not prev:
+                continue
+            change = (value - prev) / prev * 100
+            worse = -change if name in HIGHER_IS_BETTER else change
+            flag = ""
+            if worse > threshold:
+                flag = "  ⚠️ 회귀"
+                regressions += 1
+            print(f"  {scale:>7} {name:<22} {prev:12.2f} → {value:12.2f}  {change:+7.1f}%{flag}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--db-latency-ms", type=float, default=20)
+    parser.add_argument("--ttft-ms", type=float, default=400)
+    parser.add_argument("--tps", type=float, default=80, help="초당 출력 토큰 (0 = 즉시)")
+    parser.add_argument("--embed-latency-ms", type=float, default=60)
+    parser.add_argument("--dim", type=int, default=256, help="가짜 임베딩 차원")
+    parser.add_argument("--clicks", type=int, default=5)
+    parser.add_argument("--calendar-renderer", choices=["component", "buttons"], default="component")
+    parser.add_argument("--out", default=os.path.join(ROOT, ".cache", "bench_results.json"))
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--threshold", type=float, default=10, help="회귀로 볼 악화 비율(%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+    report = run(args)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as fp:
+        json.dump(report, fp, ensure_ascii=False, indent=2)
+    print(f"💾 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+증분 재적재 안전성 확인 (가짜 Supabase / 임베딩)
+사용법: python benchmarks/check_ingest.py
+
+- 부분 실패: 임베딩 API 가 죽은 채로 바뀐 문서를 다시 올려도 옛 청크를 지우지 않는지,
+  API 가 돌아온 뒤 다시 실행하면 새 청크가 저장되고 옛 청크가 지워지는지
+- 예전 경로 표기: metadata.source 가 "./guide.pdf" 로 저장된 예전 행이 다시 올릴 때
+  새 청크로 바뀌는지 (두 벌이 되지 않는지)
+확인이 하나라도 틀리면 종료 코드 1.
+"""
+
+import contextlib
+import functools
+import io
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import upload_docs  # noqa: E402
+from fakes import FakeEmbeddings, FakeSupabase  # noqa: E402
+
+
+class DownEmbeddings(FakeEmbeddings):
+    def embed_documents(self, texts):
+        raise ConnectionError("embedding API down")
+
+
+def ingest(db, embeddings, source, texts):
+    upload_docs.iter_chunks = lambda _: ((t, {"page": i}) for i, t in enumerate(texts))
+    checkpoint = upload_docs.IngestCheckpoint(upload_docs.source_key(source))
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = upload_docs.stream_source(source, embeddings, db, batch_size=2, checkpoint=checkpoint)
+        upload_docs.finish_job(checkpoint, result["failed"])
+    return result
+
+
+def sources_in(db, source):
+    return sorted(r["content"] for r in db.rows("documents") if r["metadata"]["source"] == source)
+
+
+def check_legacy_source() -> list[str]:
+    errors = []
+    db = FakeSupabase()
+    texts = [f"chunk {i}" for i in range(3)]
+    # 증분 재적재 이전 형식: 임의 id, 입력한 경로 그대로
+    db.table("documents").insert([
+        {"id": f"legacy-{i}", "content": t, "metadata": {"source": "./guide.pdf", "page": i}}
+        for i, t in enumerate(texts)
+    ]).execute()
+    for source in ("./guide.pdf", "guide.pdf"):
+        ingest(db, FakeEmbeddings(8), source, texts)
+        rows = db.rows("documents")
+        if len(rows) != len(texts) or any(r["id"].startswith("legacy-") for r in rows):
+            errors.append(f"{source} 재적재 후 행 {len(rows)}개: {sorted(r['id'] for r in rows)}")
+    return errors
+
+
+def check_partial_failure() -> list[str]:
+    errors = []
+    db = FakeSupabase()
+    old = [f"old chunk {i}" for i in range(5)]
+    new = [f"new chunk {i}" for i in range(5)]
+    ingest(db, FakeEmbeddings(8), "guide.pdf", old)
+    result = ingest(db, DownEmbeddings(8), "guide.pdf", new)
+    if sources_in(db, "guide.pdf") != old:
+        errors.append(f"임베딩 실패 중 재적재 후 남은 청크: {sources_in(db, 'guide.pdf')}")
+    if result["deleted"]:
+        errors.append(f"임베딩 실패 중 deleted={result['deleted']}")
+    ingest(db, FakeEmbeddings(8), "guide.pdf", new)
+    if sources_in(db, "guide.pdf") != new:
+        errors.append(f"복구 후 재실행 결과: {sources_in(db, 'guide.pdf')}")
+    return errors
+
+
+def main():
+    os.chdir(tempfile.mkdtemp(prefix="check_ingest_"))  # 체크포인트가 저장소를 더럽히지 않도록
+    # 실패한 배치의 재시도 백오프를 기다리지 않는다
+    upload_docs.BatchRunner = functools.partial(upload_docs.BatchRunner, max_attempts=1)
+    failures = 0
+    for name, check in (("부분 실패 시 삭제 보류", check_partial_failure),
+                        ("예전 경로 표기 소스 교체", check_legacy_source)):
+        errors = check()
+        print(f"{'✅' if not errors else '❌'} {name}")
+        for e in errors:
+            print(f"   {e}")
+        failures += bool(errors)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+벤치마크용 Supabase / OpenAI 대역 (프로세스 내)
+네트워크 없이 app.py / upload_docs.py 가 쓰는 API 모양만 흉내 낸다.
+
+- FakeSupabase: rpc("match_documents"), table().select/insert/upsert/delete + eq/neq/gt/gte/lt/lte/in_/or_/order/
+  limit/range, select(count="exact"), "metadata->>source" 같은 JSON 경로 필터
+- FakeVectorStore: SupabaseVectorStore 의 embeddings.embed_query / similarity_search_by_vector
+- FakeOpenAI: chat.completions.create (stream 포함), embeddings.create
+모든 요청에 latency 초만큼 인위적 지연을 넣을 수 있다.
+"""
+
+import hashlib
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+
+def fake_vector(text: str, dim: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(dim, dtype=np.float32)
+
+
+# ── Supabase ─────────────────────────────────────────────────────────────────
+def _value(row: dict, column: str):
+    if "->>" in column:
+        base, key = column.split("->>", 1)
+        value = (row.get(base) or {}).get(key)
+        return None if value is None else str(value)
+    if "->" in column:
+        base, key = column.split("->", 1)
+        return (row.get(base) or {}).get(key)
+    return row.get(column)
+
+
+def _coerce(row_value, value):
+    if isinstance(value, str) and isinstance(row_value, (int, float)) and not isinstance(row_value, bool):
+        try:
+            return type(row_value)(value)
+        except ValueError:
+            return value
+    return value
+
+
+_OPS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+}
+
+
+def _predicate(column, op, value):
+    compare = _OPS[op]
+
+    def check(row):
+        row_value = _value(row, column)
+        return compare(row_value, _coerce(row_value, value))
+    return check
+
+
+def _split_top(expr: str) -> list[str]:
+    parts, depth, quoted, current = [], 0, False, []
+    for ch in expr:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _parse_logic(expr: str):
+    """PostgREST or=(...) 식의 부분 집합: col.op.value, and(...), or(...)"""
+    for name, combine in (("and(", all), ("or(", any)):
+        if expr.startswith(name) and expr.endswith(")"):
+            checks = [_parse_logic(p) for p in _split_top(expr[len(name):-1])]
+            return lambda row: combine(c(row) for c in checks)
+    column, op, value = expr.split(".", 2)
+    return _predicate(column, op, value.strip('"'))
+
+
+class FakeQuery:
+    def __init__(self, db, table: str):
+        self._db = db
+        self._table = table
+        self._op = "select"
+        self._payload = None
+        self._columns = "*"
+        self._count = None
+        self._filters = []
+        self._orders = []
+        self._limit = None
+        self._range = None
+
+    def select(self, columns: str = "*", count=None):
+        self._columns, self._count = columns, count
+        return self
+
+    def insert(self, rows):
+        self._op, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = "id"):
+        self._op, self._payload, self._conflict = "upsert", rows, on_conflict
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    def __getattr__(self, op):
+        if op not in _OPS:
+            raise AttributeError(op)
+
+        def add(column, value):
+            self._filters.append(_predicate(column, op, value))
+            return self
+        return add
+
+    def in_(self, column, values):
+        allowed = set(values)
+        self._filters.append(lambda row: _value(row, column) in allowed)
+        return self
+
+    def or_(self, expr: str):
+        self._filters.append(_parse_logic(f"or({expr})"))
+        return self
+
+    def order(self, column, desc: bool = False):
+        self._orders.append((column, desc))
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def range(self, start: int, end: int):
+        self._range = (start, end)
+        return self
+
+    def _matching(self):
+        return [r for r in self._db.rows(self._table) if all(f(r) for f in self._filters)]
+
+    def execute(self):
+        self._db.wait()
+        with self._db.lock:
+            total = None
+            if self._op == "insert":
+                data = self._db.add(self._table, self._payload, replace=False)
+            elif self._op == "upsert":
+                data = self._db.add(self._table, self._payload, replace=True, key=self._conflict)
+            elif self._op == "delete":
+                data = self._db.remove(self._table, self._matching())
+            else:
+                data, total = self._select()
+            # select(count="exact") 는 limit 과 상관없이 전체 개수를 돌려준다
+            return SimpleNamespace(data=data, count=total if self._count else None)
+
+    def _select(self):
+        rows = self._matching()
+        count = len(rows)
+        for column, desc in reversed(self._orders):
+            rows.sort(key=lambda r: (_value(r, column) is None, _value(r, column)), reverse=desc)
+        if self._range is not None:
+            rows = rows[self._range[0]:self._range[1] + 1]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        if self._columns.strip() != "*":
+            columns = [c.strip() for c in self._columns.split(",")]
+            rows = [{c: r.get(c) for c in columns} for r in rows]
+        else:
+            rows = [dict(r) for r in rows]
+        return rows, count
+
+
+class FakeSupabase:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.lock = threading.RLock()
+        self.requests = 0
+        self._tables: dict[str, list[dict]] = {}
+        self._ids = itertools.count(1)
+        self._doc_matrix = None
+
+    def wait(self):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def rows(self, table: str) -> list[dict]:
+        return self._tables.setdefault(table, [])
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def add(self, table: str, payload, replace: bool, key: str = "id") -> list[dict]:
+        rows = payload if isinstance(payload, list) else [payload]
+        stored = self.rows(table)
+        index = {r.get(key): i for i, r in enumerate(stored)} if replace else {}
+        out = []
+        now = datetime.now(timezone.utc).isoformat()
+        for row in rows:
+            row = dict(row)
+            if row.get(key) in index:
+                # upsert 충돌: 기존 행을 갱신하고 id / created_at 은 유지한다
+                previous = stored[index[row[key]]]
+                row = {**previous, **row}
+                stored[index[row[key]]] = row
+                out.append(row)
+                continue
+            row.setdefault("id", next(self._ids))
+            row.setdefault("created_at", now)
+            stored.append(row)
+            if replace:
+                index[row.get(key)] = len(stored) - 1
+            out.append(row)
+        if table == "documents":
+            self._doc_matrix = None
+        return out
+
+    def remove(self, table: str, victims: list[dict]) -> list[dict]:
+        ids = {id(r) for r in victims}
+        self._tables[table] = [r for r in self.rows(table) if id(r) not in ids]
+        if table == "documents":
+            self._doc_matrix = None
+        return victims
+
+    def seed(self, table: str, rows: list[dict]):
+        with self.lock:
+            self.add(table, rows, replace=False)
+
+    def rpc(self, name: str, params: dict):
+        if name != "match_documents":
+            raise NotImplementedError(name)
+        rows = self.match_documents(params["query_embedding"], params.get("match_count", 4))
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=rows, count=None))
+
+    def match_documents(self, query_vector, k: int) -> list[dict]:
+        self.wait()
+        with self.lock:
+            docs = self.rows("documents")
+            if not docs:
+                return []
+            if self._doc_matrix is None:
+                matrix = np.asarray([d["embedding"] for d in docs], dtype=np.float32)
+                matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+                self._doc_matrix = matrix
+            q = np.asarray(query_vector, dtype=np.float32)
+            scores = self._doc_matrix @ (q / np.linalg.norm(q))
+            top = np.argsort(-scores)[:k]
+            return [docs[i] for i in top]
+
+
+class FakeEmbeddings:
+    def __init__(self, dim: int = 256, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+
+    def embed_query(self, text: str) -> list[float]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return fake_vector(text, self.dim).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [fake_vector(t, self.dim).tolist() for t in texts]
+
+
+class FakeVectorStore:
+    def __init__(self, supabase: FakeSupabase, embeddings: FakeEmbeddings):
+        self._supabase = supabase
+        self.embeddings = embeddings
+
+    def similarity_search_by_vector(self, query_vector, k: int = 4):
+        return [SimpleNamespace(page_content=r["content"], metadata=r.get("metadata", {}))
+                for r in self._supabase.match_documents(query_vector, k)]
+
+
+# ── OpenAI ───────────────────────────────────────────────────────────────────
+ANSWER = (
+    "많이 걱정되셨겠어요. 항암 치료 중 미열은 흔하지만 38도 이상이면 바로 병원에 연락하셔야 해요. "
+    "수분을 충분히 드시고 체온을 한 시간 간격으로 확인해 주세요. "
+    "하지만 정확한 현재 상태는 주치의 선생님의 판단이 가장 중요합니다."
+)
+
+
+class FakeOpenAI:
+    def __init__(self, ttft: float = 0.0, tokens_per_second: float = 0.0, dim: int = 256):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.dim = dim
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self.embeddings = SimpleNamespace(create=self._embed)
+
+    def with_options(self, **kwargs):
+        return self
+
+    def _tokens(self):
+        # 한 토큰 ≈ 두 글자로 잘라 흘려보낸다
+        return [ANSWER[i:i + 2] for i in range(0, len(ANSWER), 2)]
+
+    def _stream(self, tokens):
+        time.sleep(self.ttft)
+        for token in tokens:
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+    def _create(self, model, messages, temperature=None, stream=False, **kwargs):
+        self.calls += 1
+        tokens = self._tokens()
+        if stream:
+            return self._stream(tokens)
+        time.sleep(self.ttft + (len(tokens) / self.tokens_per_second if self.tokens_per_second else 0))
+        prompt_tokens = sum(len(str(m["content"])) for m in messages)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=ANSWER))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(tokens)),
+        )
+
+    def _embed(self, input, model=None, **kwargs):
+        self.calls += 1
+        texts = [input] if isinstance(input, str) else input
+        time.sleep(self.ttft / 3)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=fake_vector(t, self.dim).tolist())
+                                     for t in texts])
@@ -0,0 +1,56 @@
+"""
+캘린더 월 그리드 컴포넌트
+요일 헤더 + 최대 42개 날짜 버튼(st.columns/st.button)을 재실행마다 만드는 대신, 한 달
+그리드를 HTML/JS 컴포넌트 하나로 그린다. 재실행 때는 iframe 을 새로 만들지 않고 인자만
+바꿔 다시 그리므로 위젯 수가 날짜 수와 상관없이 하나다.
+
+- 컴포넌트 값은 {"action": "select" | "prev" | "next", "date", "nonce"} 이다.
+- 컴포넌트 값은 다음 재실행에도 그대로 남으므로, 호출하는 쪽은 nonce 로 처리한 이벤트를
+  다시 처리하지 않게 한다.
+"""
+
+import calendar
+import os
+from datetime import date
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "calendar_grid")
+WEEKDAYS = ["일", "월", "화", "수", "목", "금", "토"]
+PAIN_COLORS = {"🟢": "#e8f5e9", "🟡": "#fff8e1", "🔴": "#fdecea"}
+
+_component = None
+
+
+def _get_component():
+    global _component
+    if _component is None:
+        import streamlit.components.v1 as components
+        _component = components.declare_component("calendar_grid", path=FRONTEND_DIR)
+    return _component
+
+
+def month_cells(year: int, month: int, record_by_date: dict, pain_icon) -> list[list[dict | None]]:
+    today = date.today()
+    weeks = []
+    # 요일 헤더가 일요일부터이므로 주도 일요일에 시작한다
+    for week in calendar.Calendar(calendar.SUNDAY).monthdayscalendar(year, month):
+        cells = []
+        for day in week:
+            if day == 0:
+                cells.append(None)
+                continue
+            d = date(year, month, day)
+            date_str = str(d)
+            cell = {"day": day, "date": date_str, "today": d == today, "icon": "", "color": ""}
+            if date_str in record_by_date:
+                icon = pain_icon(record_by_date[date_str].get("pain_score") or 5)
+                cell["icon"], cell["color"] = icon, PAIN_COLORS.get(icon, "")
+            cells.append(cell)
+        weeks.append(cells)
+    return weeks
+
+
+def calendar_grid(year: int, month: int, selected: str, weeks: list, key: str):
+    return _get_component()(
+        year=year, month=month, selected=selected, weeks=weeks, weekdays=WEEKDAYS,
+        key=key, default=None,
+    )
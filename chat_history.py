@@ -0,0 +1,91 @@
+"""
+대화 기록 압축 (토큰 예산)
+st.session_state.messages 는 화면 표시용으로 전부 남기되, gpt-4o 에 보내는 프롬프트는
+토큰 예산 안으로 줄인다.
+
+- 프롬프트 앞부분은 고정: 시스템 프롬프트 → 이전 대화 요약 → 최근 대화 원문.
+  매 턴 바뀌는 RAG 참고자료는 마지막 사용자 메시지 바로 앞에 둬서 제공자 쪽
+  프롬프트 캐시가 앞부분을 재사용할 수 있게 한다.
+- 예산을 넘으면 최근 keep_recent 개를 뺀 나머지를 기존 요약에 접어 넣는다.
+  접을 때만 요약 모델을 부르므로 매 턴 요약하지 않는다.
+- 상태({"summary", "upto"})는 호출하는 쪽(세션 상태)에 둔다.
+"""
+
+from report import estimate_tokens
+
+
+def message_tokens(message: dict) -> int:
+    # 메시지마다 역할/구분자 오버헤드가 붙는다
+    return 4 + estimate_tokens(message["content"])
+
+
+def prompt_tokens(messages: list[dict]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+def render_turns(messages: list[dict]) -> str:
+    names = {"user": "보호자", "assistant": "김보듬"}
+    return "\n".join(f"{names.get(m['role'], m['role'])}: {m['content']}" for m in messages)
+
+
+class HistoryCompactor:
+    def __init__(self, summarize, budget_tokens: int = 6000, keep_recent: int = 6):
+        # summarize(기존 요약, 접을 메시지 목록) -> 새 요약
+        self._summarize = summarize
+        self.budget_tokens = budget_tokens
+        self.keep_recent = keep_recent
+
+    def _summary_message(self, state: dict) -> dict | None:
+        if not state.get("summary"):
+            return None
+        return {"role": "system", "content": f"## 이전 대화 요약\n{state['summary']}"}
+
+    def compact(self, messages: list[dict], state: dict) -> bool:
+        """예산을 넘었으면 오래된 대화를 요약에 접는다. 접었으면 True."""
+        upto = state.get("upto", 1)
+        summary = self._summary_message(state)
+        used = message_tokens(messages[0]) + prompt_tokens(messages[upto:])
+        if summary:
+            used += message_tokens(summary)
+        if used <= self.budget_tokens:
+            return False
+        fold_end = len(messages) - self.keep_recent
+        if fold_end <= upto:
+            return False
+        state["summary"] = self._summarize(state.get("summary", ""), messages[upto:fold_end])
+        state["upto"] = fold_end
+        return True
+
+    def build(self, messages: list[dict], state: dict, context: str = "") -> list[dict]:
+        prompt = [messages[0]]
+        summary = self._summary_message(state)
+        if summary:
+            prompt.append(summary)
+        tail = messages[state.get("upto", 1):]
+        prompt.extend(tail[:-1])
+        if context:
+            prompt.append({"role": "system", "content": context})
+        prompt.extend(tail[-1:])
+        return prompt
+
+
+def make_summarizer(client, model: str = "gpt-4o-mini"):
+    def summarize(previous: str, turns: list[dict]) -> str:
+        prompt = f"""
+다음은 암 환자 보호자와 수간호사 김보듬의 이전 대화 요약과, 그 뒤에 이어진 대화입니다.
+둘을 합쳐 갱신된 요약을 작성하세요. 환자 상태와 증상 변화, 언급된 약/식단, 보호자의 걱정,
+이미 안내한 내용(추천한 링크 포함)을 빠뜨리지 말고 600자 이내로 정리하세요.
+
+[이전 요약]
+{previous or "(없음)"}
+
+[이어진 대화]
+{render_turns(turns)}"""
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0,
+        )
+        return response.choices[0].message.content
+
+    return summarize
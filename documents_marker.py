@@ -0,0 +1,27 @@
+"""
+documents 변경 마커 파일
+upload_docs.py 가 documents 테이블을 바꾼 뒤 마커를 갱신하면, 같은 호스트의 앱(answer_cache,
+local_index)이 mtime 변화를 보고 바로 무효화한다. 다른 호스트는 각자의 주기적 확인에 맡긴다.
+
+업로드 스크립트가 numpy 등을 임포트하지 않도록 표준 라이브러리만 쓴다. 경로는 작업 디렉터리가
+아니라 앱 폴더 기준이라 어디서 스크립트를 실행해도 앱이 읽는 파일을 갱신한다.
+"""
+
+import os
+import time
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+DOCUMENTS_MARKER = os.path.join(APP_ROOT, ".cache", "documents.version")
+
+
+def touch_documents_marker():
+    os.makedirs(os.path.dirname(DOCUMENTS_MARKER), exist_ok=True)
+    with open(DOCUMENTS_MARKER, "w", encoding="utf-8") as fp:
+        fp.write(str(time.time()))
+
+
+def read_marker_mtime():
+    try:
+        return os.path.getmtime(DOCUMENTS_MARKER)
+    except OSError:
+        return None
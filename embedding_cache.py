@@ -0,0 +1,129 @@
+"""
+질문 임베딩 캐시
+보호자들은 같은 질문("열이 나요", "이거 먹어도 돼?")을 반복하므로, 정규화한 질문
+텍스트 → 임베딩 벡터를 캐시해 text-embedding-3-small 왕복을 줄인다.
+
+- 1차: 메모리 LRU (프로세스 내 모든 세션 공유)
+- 2차: SQLite 파일 (선택). 재시작 후에도 유지되며 용량 초과 시 오래 안 쓴 항목부터 삭제
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+_TRAILING = "?!.~ "
+
+
+def normalize_query(text: str) -> str:
+    text = unicodedata.normalize("NFC", text)
+    text = " ".join(text.split()).lower()
+    return text.rstrip(_TRAILING)
+
+
+class EmbeddingCache:
+    def __init__(self, model: str, max_items: int = 512,
+                 db_path: str | None = None, max_db_bytes: int = 50 * 1024 * 1024):
+        self.model = model
+        self.max_items = max_items
+        self.max_db_bytes = max_db_bytes
+        self._memory: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)"
+            )
+            self._db.commit()
+
+    def _key(self, text: str) -> str:
+        raw = f"{self.model}\n{normalize_query(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> list[float] | None:
+        key = self._key(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    vector = array("f", row[0]).tolist()
+                    self._db.execute(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?", (time.time(), key)
+                    )
+                    self._db.commit()
+                    self._remember(key, vector)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return vector
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vector: list[float]):
+        key = self._key(text)
+        with self._lock:
+            self._remember(key, list(vector))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    (key, array("f", vector).tobytes(), time.time()),
+                )
+                self._evict_disk()
+                self._db.commit()
+
+    def _remember(self, key: str, vector: list[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+        if total <= self.max_db_bytes:
+            return
+        # 오래 안 쓴 항목부터 용량의 90% 이하가 될 때까지 삭제
+        excess = total - int(self.max_db_bytes * 0.9)
+        rows = self._db.execute("SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used")
+        victims = []
+        for key, size in rows:
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._db.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            disk_items = 0
+            if self._db is not None:
+                disk_items = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "disk_items": disk_items,
+            }
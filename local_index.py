@@ -0,0 +1,147 @@
+"""
+documents 로컬 벡터 인덱스 (선택 기능)
+참고 문서 코퍼스는 메모리에 충분히 들어가므로, 정규화한 임베딩 행렬을 프로세스에
+들고 있다가 행렬곱 한 번으로 top-k 를 찾는다. match_documents RPC 왕복이 없어진다.
+
+- 시작 시 디스크 사본(.npy, 메모리 매핑)을 읽고 documents 와 증분 동기화한다
+  (id 목록을 비교해 새 행만 내려받고 사라진 행은 뺀다)
+- max_age_seconds 가 지났거나 upload_docs.py 가 마커 파일을 갱신했으면 stale 로 보고,
+  그동안 검색은 Supabase 로 돌리며 백그라운드에서 다시 동기화한다
+- 검색 비용은 코퍼스 크기에 비례한다. 1536차원 기준 bench_local_index 측정값은
+  1천 청크 약 0.3 ms, 5천 약 1.4 ms, 2만 약 10 ms (1 ms 미만은 수천 청크 이하일 때만)
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from documents_marker import read_marker_mtime
+
+
+def _parse_embedding(value) -> list[float]:
+    # pgvector 컬럼은 PostgREST 에서 "[0.1,0.2,...]" 문자열로 온다
+    return json.loads(value) if isinstance(value, str) else value
+
+
+class LocalVectorIndex:
+    def __init__(self, fetch_ids, fetch_rows, path: str | None = None,
+                 max_age_seconds: float = 600):
+        # fetch_ids() -> 전체 id 목록, fetch_rows(ids) -> [{"id", "content", "embedding"}]
+        self._fetch_ids = fetch_ids
+        self._fetch_rows = fetch_rows
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._ids: list[str] = []
+        self._contents: list[str] = []
+        self._synced_at = 0.0
+        self._marker_mtime = None
+        self.searches = 0
+        self.fallbacks = 0
+        self.last_sync_seconds = None
+        self.last_error = None
+        self._load_disk()
+
+    def _load_disk(self):
+        if not self.path or not os.path.exists(self.path + ".npy"):
+            return
+        try:
+            with open(self.path + ".json", encoding="utf-8") as fp:
+                meta = json.load(fp)
+            matrix = np.load(self.path + ".npy", mmap_mode="r")
+        except (OSError, ValueError):
+            return
+        if len(meta["ids"]) == matrix.shape[0]:
+            self._matrix, self._ids, self._contents = matrix, meta["ids"], meta["contents"]
+
+    def _save_disk(self, matrix, ids, contents):
+        if not self.path:
+            return matrix
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        np.save(self.path + ".tmp.npy", matrix)
+        with open(self.path + ".tmp.json", "w", encoding="utf-8") as fp:
+            json.dump({"ids": ids, "contents": contents}, fp, ensure_ascii=False)
+        os.replace(self.path + ".tmp.npy", self.path + ".npy")
+        os.replace(self.path + ".tmp.json", self.path + ".json")
+        return np.load(self.path + ".npy", mmap_mode="r")
+
+    def is_stale(self) -> bool:
+        if time.time() - self._synced_at > self.max_age_seconds:
+            return True
+        return read_marker_mtime() != self._marker_mtime
+
+    def sync(self):
+        with self._sync_lock:
+            started = time.perf_counter()
+            marker_mtime = read_marker_mtime()
+            remote_ids = self._fetch_ids()
+            with self._lock:
+                matrix, ids, contents = self._matrix, self._ids, self._contents
+            remote = set(remote_ids)
+            keep = [i for i, row_id in enumerate(ids) if row_id in remote]
+            missing = sorted(remote - set(ids))
+            if missing or len(keep) != len(ids):
+                rows = self._fetch_rows(missing) if missing else []
+                new_vectors = np.asarray([_parse_embedding(r["embedding"]) for r in rows],
+                                         dtype=np.float32)
+                if len(rows):
+                    norms = np.linalg.norm(new_vectors, axis=1, keepdims=True)
+                    new_vectors /= np.where(norms == 0, 1, norms)
+                kept = np.asarray(matrix[keep], dtype=np.float32) if keep else None
+                parts = [p for p in (kept, new_vectors if len(rows) else None) if p is not None]
+                matrix = np.vstack(parts) if parts else np.empty((0, 0), dtype=np.float32)
+                ids = [ids[i] for i in keep] + [r["id"] for r in rows]
+                contents = [contents[i] for i in keep] + [r["content"] for r in rows]
+                matrix = self._save_disk(matrix, ids, contents)
+            with self._lock:
+                self._matrix, self._ids, self._contents = matrix, ids, contents
+                self._synced_at = time.time()
+                self._marker_mtime = marker_mtime
+            self.last_sync_seconds = time.perf_counter() - started
+
+    def sync_in_background(self):
+        if self._sync_lock.locked():
+            return
+
+        def run():
+            try:
+                self.sync()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = repr(e)
+
+        threading.Thread(target=run, name="local-index-sync", daemon=True).start()
+
+    def search(self, query_vector, k: int = 3) -> list[str] | None:
+        """로컬 top-k 본문. stale 이면 None 을 돌려주고 백그라운드 동기화를 건다."""
+        if self.is_stale():
+            self.fallbacks += 1
+            self.sync_in_background()
+            return None
+        with self._lock:
+            matrix, contents = self._matrix, self._contents
+        self.searches += 1
+        if not contents:
+            return []
+        q = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        scores = matrix @ (q / norm if norm else q)
+        k = min(k, len(contents))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [contents[i] for i in top[np.argsort(-scores[top])]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._ids),
+                "searches": self.searches,
+                "fallbacks": self.fallbacks,
+                "stale": self.is_stale(),
+                "last_sync_ms": self.last_sync_seconds * 1000 if self.last_sync_seconds is not None else None,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,317 @@
+"""
+로컬 선기록(write-ahead) 저장소 + 백그라운드 동기화
+병상 옆에서 저장 버튼을 누르면 Supabase 왕복을 기다리지 않고 로컬 SQLite(WAL)에 먼저
+커밋한다. 백그라운드 스레드가 배치로 Supabase 에 올린다.
+
+- 행마다 client_key(UUID)를 붙여 upsert(on_conflict=client_key)로 보내므로, 응답을 못 받고
+  다시 보내도 중복 행이 생기지 않는다. sessions 는 기존 id(UUID)를 키로 쓴다.
+- record_files 처럼 부모 행의 서버 id 가 필요한 행은 depends_on 으로 부모 client_key 를
+  기억해 두었다가, 부모가 올라간 뒤 record_id 를 채워 보낸다.
+- 배치가 실패하면 지수 백오프 후 한 행씩 다시 보낸다. 서버가 max_attempts 번 거절한 행은
+  failed 로 빼 두고(나머지는 계속 진행) 화면에 알린다. 일시적 오류(연결 끊김, 5xx, 429 —
+  transient.is_transient)는 횟수에 넣지 않으므로 Supabase 장애가 길어져도 행이 failed 가 되지 않는다. failed 행은 retry_failed_minutes 뒤나
+  retry_failed() 호출 시 다시 보낸다.
+- 아직 올라가지 않은 daily_records 는 pending() 으로 읽어 화면에 합쳐 보여준다.
+- 올라간 행은 on_synced(table, rows) 콜백으로 알린다 (캐시 무효화, 집계 반영).
+  콜백 오류는 callback_errors / last_callback_error 로 stats() 에 남긴다.
+- upsert 응답에 id 가 없으면 client_key 로 한 번 더 조회한다. 그래도 모르면 자식 행은
+  보내지 않고 기다린다 (stats() 의 blocked_rows).
+- enqueue / flush / stats 는 WriteBehindQueue 와 같은 모양이라 채팅 로그에도 그대로 쓴다.
+
+Supabase 쪽에는 daily_records / record_files / chat_logs 에 유니크 client_key 컬럼이 필요하다:
+  alter table <table> add column client_key text unique;
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from transient import is_transient
+
+# 테이블별 멱등 키 컬럼 (없으면 client_key)
+CONFLICT_KEYS = {"sessions": "id"}
+
+
+class LocalWriteStore:
+    def __init__(self, supabase_client, db_path: str = ".cache/local_store.sqlite3",
+                 batch_size: int = 50, sync_interval: float = 2.0, max_backoff: float = 60.0,
+                 max_attempts: int = 8, retry_failed_minutes: float = 10, keep_synced_hours: float = 24,
+                 on_synced=None):
+        self._client = supabase_client
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.retry_failed_seconds = retry_failed_minutes * 60
+        self.keep_synced_seconds = keep_synced_hours * 3600
+        self.on_synced = on_synced
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._closed = False
+        self._backoff = 0.0
+        self._one_by_one = False
+        self._backlog = False
+        self.synced_rows = 0
+        self.sync_count = 0
+        self.failed_attempts = 0
+        self.last_error = None
+        self.callback_errors = 0
+        self.last_callback_error = None
+        self.last_sync_seconds = None
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, tbl TEXT NOT NULL, client_key TEXT NOT NULL UNIQUE,"
+            " payload TEXT NOT NULL, depends_on TEXT, status TEXT NOT NULL DEFAULT 'pending',"
+            " attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, attempted_at REAL, server_id TEXT,"
+            " created_at TEXT NOT NULL, synced_at REAL);"
+            "CREATE INDEX IF NOT EXISTS outbox_status ON outbox(status, seq);"
+        )
+        self._db.commit()
+        self._thread = threading.Thread(target=self._run, name="local-store-sync", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ── 쓰기 ────────────────────────────────────────────────────────────────
+    def add_many(self, table: str, rows: list[dict], depends_on: str | None = None) -> list[str]:
+        """행들을 한 트랜잭션으로 로컬에 커밋하고 client_key 목록을 돌려준다."""
+        keys = []
+        now = datetime.now(timezone.utc).isoformat()
+        with self._cond:
+            for row in rows:
+                row = dict(row)
+                key_column = CONFLICT_KEYS.get(table, "client_key")
+                key = str(row.get(key_column) or uuid.uuid4())
+                row[key_column] = key
+                self._db.execute(
+                    "INSERT OR IGNORE INTO outbox (tbl, client_key, payload, depends_on, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (table, key, json.dumps(row, ensure_ascii=False, default=str), depends_on, now),
+                )
+                keys.append(key)
+            self._db.commit()
+            self._cond.notify_all()
+        return keys
+
+    def add(self, table: str, row: dict, depends_on: str | None = None) -> str:
+        return self.add_many(table, [row], depends_on)[0]
+
+    def enqueue(self, table: str, row: dict):
+        self.add(table, row)
+
+    # ── 읽기 ────────────────────────────────────────────────────────────────
+    def pending(self, table: str, column: str | None = None, start=None, end=None) -> list[dict]:
+        """아직 서버에 없는 행 (pending + failed). column 이 있으면 [start, end) 로 거른다."""
+        with self._cond:
+            rows = self._db.execute(
+                "SELECT payload, client_key, status, created_at FROM outbox "
+                "WHERE tbl = ? AND status != 'synced' ORDER BY seq", (table,)
+            ).fetchall()
+        out = []
+        for payload, key, status, created_at in rows:
+            row = json.loads(payload)
+            if column is not None:
+                value = str(row.get(column))
+                if (start is not None and value < str(start)) or (end is not None and value >= str(end)):
+                    continue
+            row.update({"id": None, "client_key": key, "created_at": created_at, "sync_status": status})
+            out.append(row)
+        return out
+
+    # ── 동기화 ──────────────────────────────────────────────────────────────
+    def flush(self, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._count("pending"):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def retry_failed(self):
+        with self._cond:
+            self._db.execute("UPDATE outbox SET status = 'pending', attempts = 0 WHERE status = 'failed'")
+            self._db.commit()
+            self._cond.notify_all()
+
+    def _count(self, status: str) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM outbox WHERE status = ?", (status,)).fetchone()[0]
+
+    def _next_batch(self) -> list[tuple]:
+        # 부모가 아직 안 올라간 행은 건너뛴다 (부모가 failed 면 같이 기다린다)
+        limit = 1 if self._one_by_one else self.batch_size
+        return self._db.execute(
+            "SELECT o.seq, o.tbl, o.client_key, o.payload, p.server_id FROM outbox o "
+            "LEFT JOIN outbox p ON p.client_key = o.depends_on "
+            "WHERE o.status = 'pending' AND (o.depends_on IS NULL OR p.server_id != '') "
+            "ORDER BY o.seq LIMIT ?", (limit,)
+        ).fetchall()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not (self._closed or self._flush_requested or self._backlog):
+                    self._cond.wait(self.sync_interval)
+                batch = self._next_batch()
+                self._backlog = False
+                if not batch:
+                    self._flush_requested = False
+                    self._prune()
+                    self._cond.notify_all()
+                    if self._closed:
+                        return
+                    continue
+
+            synced, error = self._push(batch)
+
+            with self._cond:
+                for table, rows in synced:
+                    self._db.executemany(
+                        "UPDATE outbox SET status = 'synced', server_id = ?, synced_at = ? WHERE client_key = ?",
+                        [(server_id, time.time(), key) for key, server_id, _ in rows],
+                    )
+                if error is not None and self._one_by_one and not is_transient(error):
+                    # 한 행씩 보낼 때 서버가 거절한 행만 시도 횟수를 센다 (일시적 오류는 세지 않는다)
+                    self._db.executemany(
+                        "UPDATE outbox SET attempts = attempts + 1, last_error = ?, attempted_at = ?, "
+                        "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE status END WHERE seq = ?",
+                        [(repr(error)[:500], time.time(), self.max_attempts, seq) for seq, *_ in batch],
+                    )
+                self._db.commit()
+                self._cond.notify_all()
+
+            if self.on_synced is not None:
+                for table, rows in synced:
+                    try:
+                        self.on_synced(table, [row for _, _, row in rows])
+                    except Exception as e:
+                        # 캐시 무효화가 빠지면 화면에서 기록이 TTL 동안 안 보이므로 남겨서 알린다
+                        self.callback_errors += 1
+                        self.last_callback_error = repr(e)
+
+            if error is None:
+                self._backoff = 0.0
+                self._one_by_one = False
+                # 밀린 행이 더 있으면 sync_interval 을 기다리지 않고 이어서 보낸다
+                self._backlog = True
+            else:
+                self.failed_attempts += 1
+                self.last_error = repr(error)
+                self._backoff = min(self.max_backoff, (self._backoff * 2) or 0.5)
+                # 어느 행이 문제인지 모르니 다음부터는 한 행씩 보낸다
+                self._one_by_one = True
+                if self._closed:
+                    return
+                time.sleep(self._backoff)
+
+    def _push(self, batch):
+        """연속된 같은 테이블끼리 upsert 한다. ([(table, [(client_key, server_id, row)])], error)"""
+        synced = []
+        started = time.perf_counter()
+        try:
+            i = 0
+            while i < len(batch):
+                table = batch[i][1]
+                j = i
+                while j < len(batch) and batch[j][1] == table:
+                    j += 1
+                key_column = CONFLICT_KEYS.get(table, "client_key")
+                payloads = []
+                for _, _, _, payload, parent_id in batch[i:j]:
+                    row = json.loads(payload)
+                    if parent_id and table == "record_files":
+                        row["record_id"] = int(parent_id) if parent_id.isdigit() else parent_id
+                    payloads.append(row)
+                result = self._client.table(table).upsert(payloads, on_conflict=key_column).execute()
+                by_key = {str(r.get(key_column)): r for r in (result.data or [])}
+                missing = [str(p[key_column]) for p in payloads
+                           if not _server_id(by_key.get(str(p[key_column])))]
+                if missing:
+                    # 응답에 id 가 없으면(returning=minimal 등) 키로 다시 읽는다. 자식 행이 id 를 기다린다
+                    found = self._client.table(table).select(f"id, {key_column}") \
+                        .in_(key_column, missing).execute().data or []
+                    payload_by_key = {str(p[key_column]): p for p in payloads}
+                    for r in found:
+                        k = str(r.get(key_column))
+                        by_key[k] = {**by_key.get(k, payload_by_key.get(k, {})), **r}
+                synced.append((table, [
+                    (str(p[key_column]), _server_id(by_key.get(str(p[key_column]))),
+                     by_key.get(str(p[key_column]), p))
+                    for p in payloads
+                ]))
+                i = j
+        except Exception as e:
+            return synced, e
+        finally:
+            if synced:
+                elapsed = time.perf_counter() - started
+                self.last_sync_seconds = elapsed
+                self.sync_count += 1
+                self.synced_rows += sum(len(rows) for _, rows in synced)
+        return synced, None
+
+    def _prune(self):
+        # failed 행도 버리지 않는다. 일정 시간이 지나면 다시 보내 본다
+        self._db.execute(
+            "UPDATE outbox SET status = 'pending', attempts = 0 WHERE status = 'failed' AND attempted_at < ?",
+            (time.time() - self.retry_failed_seconds,),
+        )
+        self._db.execute(
+            "DELETE FROM outbox WHERE status = 'synced' AND synced_at < ? "
+            "AND client_key NOT IN (SELECT depends_on FROM outbox WHERE depends_on IS NOT NULL "
+            "AND status != 'synced')",
+            (time.time() - self.keep_synced_seconds,),
+        )
+        self._db.commit()
+
+    # ── 상태 ────────────────────────────────────────────────────────────────
+    def depth(self) -> int:
+        with self._cond:
+            return self._count("pending")
+
+    def stats(self) -> dict:
+        with self._cond:
+            pending, failed = self._count("pending"), self._count("failed")
+            blocked = self._db.execute(
+                "SELECT COUNT(*) FROM outbox o JOIN outbox p ON p.client_key = o.depends_on "
+                "WHERE o.status = 'pending' AND p.status = 'synced' AND p.server_id = ''"
+            ).fetchone()[0]
+            error = self._db.execute(
+                "SELECT last_error FROM outbox WHERE status = 'failed' ORDER BY seq DESC LIMIT 1"
+            ).fetchone()
+        return {
+            "depth": pending,
+            "failed_rows": failed,
+            "failed_row_error": error[0] if error else None,
+            "synced_rows": self.synced_rows,
+            "sync_count": self.sync_count,
+            "last_flush_ms": self.last_sync_seconds * 1000 if self.last_sync_seconds is not None else None,
+            "blocked_rows": blocked,
+            "failed_attempts": self.failed_attempts,
+            "last_error": self.last_error,
+            "callback_errors": self.callback_errors,
+            "last_callback_error": self.last_callback_error,
+            "backoff_seconds": self._backoff,
+        }
+
+
+def _server_id(row: dict | None) -> str:
+    # 서버가 행을 돌려주지 않으면(권한 등) id 를 모르므로 빈 문자열로 '올라감'만 표시한다
+    return str(row["id"]) if row and row.get("id") is not None else ""
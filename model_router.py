@@ -0,0 +1,97 @@
+"""
+모델 라우팅 (gpt-4o-mini ↔ gpt-4o)
+요청마다 로컬에서 분류해 단순 질의는 빠른 모델로, 복잡하거나 안전이 걸린 요청은 큰 모델로 보낸다.
+
+- 채팅: 응급 신호(감지기 결과 또는 발열/경련/의식 관련 단어가 부정 여부와 상관없이 보이면) → 큰 모델, 진단서/검사 해석 같은 질문·긴 메시지·긴 참고자료 → 큰 모델,
+  나머지(단순 질의) → 빠른 모델. 빠른 모델 답이 짧거나 얼버무리면 큰 모델로 다시 묻는다.
+- 레포트: 구간 요약(map)은 빠른 모델, 최종 레포트(reduce)는 큰 모델.
+- 경로별 지연/토큰 수를 RouteStats 에 모으고, log_path 를 주면 JSONL 로 남겨
+  임계값(routing table)을 실제 데이터로 조정할 수 있게 한다.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import deque
+
+from red_flags import mentions_emergency
+
+FAST_MODEL = "gpt-4o-mini"
+LARGE_MODEL = "gpt-4o"
+LONG_MESSAGE_CHARS = 200
+LONG_CONTEXT_CHARS = 3000
+
+_COMPLEX = re.compile(
+    r"진단서|소견서|판독|검사\s*결과|수치|해석|병기|전이|조직검사|CT|MRI|PET|CA\s*19|CEA|"
+    r"항암제|표적|면역\s*치료|부작용|상호\s*작용|임상\s*시험|예후|생존율|비교|차이"
+)
+_HEDGE = re.compile(
+    r"잘\s*모르겠|확실하지\s*않|정보가\s*부족|답변\s*드리기\s*어렵|알\s*수\s*없|판단하기\s*어렵"
+)
+
+
+def route_chat(user_input: str, context: str = "", red_flags=(), fast_model: str = FAST_MODEL,
+               large_model: str = LARGE_MODEL, long_message_chars: int = LONG_MESSAGE_CHARS,
+               long_context_chars: int = LONG_CONTEXT_CHARS) -> dict:
+    """{"route", "model", "escalate_to"} — escalate_to 는 빠른 모델 경로에서만 채워진다."""
+    if red_flags or mentions_emergency(user_input):
+        route = "chat.safety"
+    elif _COMPLEX.search(user_input):
+        route = "chat.interpretation"
+    elif len(user_input) > long_message_chars:
+        route = "chat.long_message"
+    elif len(context) > long_context_chars:
+        route = "chat.long_context"
+    else:
+        return {"route": "chat.simple", "model": fast_model, "escalate_to": large_model}
+    return {"route": route, "model": large_model, "escalate_to": None}
+
+
+def needs_escalation(answer: str, min_chars: int = 40) -> bool:
+    return not answer or len(answer.strip()) < min_chars or bool(_HEDGE.search(answer))
+
+
+class RouteStats:
+    def __init__(self, max_samples: int = 500, log_path: str | None = None):
+        self.log_path = log_path
+        self._samples: dict[str, deque] = {}
+        self._counts: dict[str, dict] = {}
+        self._max_samples = max_samples
+        self._lock = threading.Lock()
+
+    def record(self, route: str, model: str, seconds: float, ttft: float | None = None,
+               prompt_tokens: int | None = None, completion_tokens: int | None = None,
+               escalated: bool = False):
+        entry = {"route": route, "model": model, "seconds": seconds, "ttft": ttft,
+                 "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "escalated": escalated, "at": time.time()}
+        key = f"{route} · {model}"
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self._max_samples)).append(entry)
+            counts = self._counts.setdefault(key, {"calls": 0, "escalated": 0, "prompt_tokens": 0,
+                                                   "completion_tokens": 0})
+            counts["calls"] += 1
+            counts["escalated"] += int(escalated)
+            counts["prompt_tokens"] += prompt_tokens or 0
+            counts["completion_tokens"] += completion_tokens or 0
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as fp:
+                    fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def summary(self) -> list[dict]:
+        rows = []
+        with self._lock:
+            for key, samples in sorted(self._samples.items()):
+                seconds = sorted(s["seconds"] for s in samples)
+                counts = self._counts[key]
+                rows.append({
+                    "route": key,
+                    "calls": counts["calls"],
+                    "p50_s": round(seconds[len(seconds) // 2], 2),
+                    "p95_s": round(seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))], 2),
+                    "avg_prompt_tokens": counts["prompt_tokens"] // counts["calls"],
+                    "avg_completion_tokens": counts["completion_tokens"] // counts["calls"],
+                    "escalated": counts["escalated"],
+                })
+        return rows
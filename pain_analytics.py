@@ -0,0 +1,235 @@
+"""
+통증 점수 분석 (일별 집계 + 추세 차트)
+추세 화면이 재실행마다 daily_records 전체를 다시 읽지 않도록, 날짜별 집계를 SQLite 에
+유지하고 차트는 집계 배열만으로 그린다.
+
+- 일별 집계(기록 수, 통증 점수 합/개수/최대)와 보호자별 기록 수를 행 단위로 더해 간다.
+  save_daily_record 가 저장한 행은 apply() 로 바로 반영하고, 다른 프로세스가 쓴 행은
+  sync() 가 id 커서 이후만 읽어 반영한다. 반영한 id 를 기억하므로 두 번 세지 않는다.
+- 이동 평균과 변화점(앞뒤 구간 평균 차이)은 NumPy 로 집계 배열 전체에 한 번에 계산한다.
+- 차트는 최대 max_points 구간으로 줄여(구간 평균/최대) 그리므로 몇 년치도 그리는 비용이 같다.
+- 기록 삭제/수정은 다루지 않는다 (앱에 해당 기능이 없다). 필요하면 rebuild() 로 다시 만든다.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+ROLLING_DAYS = 7
+CHANGE_WINDOW = 7
+CHANGE_THRESHOLD = 1.5
+MAX_POINTS = 365
+
+
+def fetch_records_after(supabase_client, last_id, page_size: int = 1000) -> list[dict]:
+    query = supabase_client.table("daily_records") \
+        .select("id, record_date, caregiver_name, pain_score")
+    if last_id is not None:
+        query = query.gt("id", last_id)
+    return query.order("id").limit(page_size).execute().data
+
+
+class PainAggregates:
+    def __init__(self, db_path: str, fetch_after, sync_interval: float = 60):
+        # fetch_after(last_id) -> id 오름차순 한 페이지 (빈 목록이면 끝)
+        self._fetch_after = fetch_after
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._synced_at = 0.0
+        self.version = 0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS daily_pain ("
+            " record_date TEXT PRIMARY KEY, entries INTEGER NOT NULL, scored INTEGER NOT NULL,"
+            " pain_sum REAL NOT NULL, pain_max INTEGER);"
+            "CREATE TABLE IF NOT EXISTS daily_caregiver ("
+            " record_date TEXT NOT NULL, caregiver_name TEXT NOT NULL, entries INTEGER NOT NULL,"
+            " PRIMARY KEY (record_date, caregiver_name));"
+            "CREATE TABLE IF NOT EXISTS applied (id TEXT PRIMARY KEY);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        self._db.commit()
+
+    def _apply_rows(self, rows: list[dict]) -> int:
+        applied = 0
+        for r in rows:
+            if r.get("id") is not None:
+                cur = self._db.execute("INSERT OR IGNORE INTO applied (id) VALUES (?)", (str(r["id"]),))
+                if cur.rowcount == 0:
+                    continue
+            pain = r.get("pain_score")
+            self._db.execute(
+                "INSERT INTO daily_pain (record_date, entries, scored, pain_sum, pain_max) "
+                "VALUES (?, 1, ?, ?, ?) ON CONFLICT(record_date) DO UPDATE SET "
+                " entries = entries + 1, scored = scored + excluded.scored,"
+                " pain_sum = pain_sum + excluded.pain_sum,"
+                " pain_max = MAX(COALESCE(pain_max, excluded.pain_max), COALESCE(excluded.pain_max, pain_max))",
+                (str(r["record_date"]), int(pain is not None), pain or 0, pain),
+            )
+            self._db.execute(
+                "INSERT INTO daily_caregiver (record_date, caregiver_name, entries) VALUES (?, ?, 1) "
+                "ON CONFLICT(record_date, caregiver_name) DO UPDATE SET entries = entries + 1",
+                (str(r["record_date"]), r.get("caregiver_name") or "-"),
+            )
+            applied += 1
+        return applied
+
+    def apply(self, record: dict):
+        """방금 저장한 daily_records 한 행을 집계에 더한다."""
+        with self._lock:
+            if self._apply_rows([record]):
+                self._db.commit()
+                self.version += 1
+
+    def _cursor(self):
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'last_id'").fetchone()
+        if row is None:
+            return None
+        return int(row[0]) if row[0].isdigit() else row[0]
+
+    def sync(self, force: bool = False) -> int:
+        """커서 이후 행을 읽어 반영한다. sync_interval 안에 다시 부르면 건너뛴다."""
+        with self._lock:
+            if not force and time.time() - self._synced_at < self.sync_interval:
+                return 0
+            applied = 0
+            last_id = self._cursor()
+            while True:
+                rows = self._fetch_after(last_id)
+                if not rows:
+                    break
+                applied += self._apply_rows(rows)
+                last_id = rows[-1]["id"]
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_id', ?)", (str(last_id),)
+                )
+                self._db.commit()
+            self._synced_at = time.time()
+            if applied:
+                self.version += 1
+            return applied
+
+    def rebuild(self):
+        with self._lock:
+            self._db.executescript(
+                "DELETE FROM daily_pain; DELETE FROM daily_caregiver; DELETE FROM applied; DELETE FROM meta;"
+            )
+            self._db.commit()
+        self.sync(force=True)
+
+    def series(self, start: date | None = None, end: date | None = None) -> dict:
+        """빈 날짜를 채운 연속 일별 배열: dates, entries, mean(기록 없으면 nan), max"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT record_date, entries, scored, pain_sum, pain_max FROM daily_pain "
+                "WHERE record_date >= ? AND record_date <= ? ORDER BY record_date",
+                (str(start or "0000-01-01"), str(end or "9999-12-31")),
+            ).fetchall()
+        if not rows:
+            return {"dates": np.array([], dtype="datetime64[D]"), "entries": np.zeros(0),
+                    "mean": np.zeros(0), "max": np.zeros(0)}
+        days = np.array([r[0] for r in rows], dtype="datetime64[D]")
+        first = np.datetime64(start, "D") if start else days[0]
+        last = np.datetime64(end, "D") if end else days[-1]
+        dates = np.arange(first, last + 1)
+        index = (days - first).astype(int)
+        entries = np.zeros(len(dates))
+        mean = np.full(len(dates), np.nan)
+        peak = np.full(len(dates), np.nan)
+        scored = np.array([r[2] for r in rows], dtype=float)
+        entries[index] = [r[1] for r in rows]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean[index] = np.where(scored > 0, np.array([r[3] for r in rows], dtype=float) / scored, np.nan)
+        peak[index] = [np.nan if r[4] is None else r[4] for r in rows]
+        return {"dates": dates, "entries": entries, "mean": mean, "max": peak}
+
+    def caregiver_counts(self, start: date | None = None, end: date | None = None) -> dict[str, int]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT caregiver_name, SUM(entries) FROM daily_caregiver "
+                "WHERE record_date >= ? AND record_date <= ? GROUP BY caregiver_name "
+                "ORDER BY SUM(entries) DESC",
+                (str(start or "0000-01-01"), str(end or "9999-12-31")),
+            ).fetchall()
+        return dict(rows)
+
+
+def rolling_mean(values: np.ndarray, window: int = ROLLING_DAYS) -> np.ndarray:
+    """nan(기록 없는 날)은 건너뛰는 후행 이동 평균. 창 안에 값이 없으면 nan."""
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0))
+    counts = np.cumsum(valid)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def change_points(values: np.ndarray, window: int = CHANGE_WINDOW,
+                  threshold: float = CHANGE_THRESHOLD) -> np.ndarray:
+    """앞 window 일과 뒤 window 일의 평균 차이가 threshold 이상이고 그 근방에서 가장 큰 날의 인덱스."""
+    n = len(values)
+    if n < 2 * window:
+        return np.array([], dtype=int)
+    before = rolling_mean(values, window)            # [i-window+1, i]
+    after = rolling_mean(values[::-1], window)[::-1]  # [i, i+window-1]
+    diff = np.full(n, np.nan)
+    diff[window:] = after[window:] - before[window - 1:-1]
+    diff[n - window + 1:] = np.nan  # 끝부분은 뒤 구간이 window 일보다 짧다
+    magnitude = np.nan_to_num(np.abs(diff))
+    # 같은 변화가 여러 날에 걸쳐 잡히지 않도록 ±window 안의 최댓값만 남긴다
+    padded = np.pad(magnitude, window)
+    local_max = np.lib.stride_tricks.sliding_window_view(padded, 2 * window + 1).max(axis=1)
+    return np.flatnonzero((magnitude >= threshold) & (magnitude == local_max))
+
+
+def downsample(dates: np.ndarray, values: np.ndarray, max_points: int = MAX_POINTS,
+               how: str = "mean") -> tuple[np.ndarray, np.ndarray]:
+    """길이를 max_points 구간으로 줄인다. 구간 첫 날짜와 구간 평균(nan 제외) 또는 최대."""
+    n = len(values)
+    if n <= max_points:
+        return dates, values
+    starts = np.linspace(0, n, max_points, endpoint=False).astype(int)
+    valid = ~np.isnan(values)
+    if how == "max":
+        filled = np.where(valid, values, -np.inf)
+        out = np.maximum.reduceat(filled, starts)
+        out[np.isinf(out)] = np.nan
+    else:
+        sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        counts = np.add.reduceat(valid.astype(float), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = np.where(counts > 0, sums / counts, np.nan)
+    return dates[starts], out
+
+
+def trend_figure(series: dict, rolling_days: int = ROLLING_DAYS, max_points: int = MAX_POINTS,
+                 threshold: float = CHANGE_THRESHOLD):
+    import plotly.graph_objects as go
+
+    dates, mean = series["dates"], series["mean"]
+    rolling = rolling_mean(mean, rolling_days)
+    changes = change_points(mean, rolling_days, threshold)
+    fig = go.Figure()
+    x, y = downsample(dates, series["max"], max_points, how="max")
+    fig.add_trace(go.Scatter(x=x, y=y, mode="markers", name="최대", marker={"color": "#f4a6a6", "size": 4}))
+    x, y = downsample(dates, mean, max_points)
+    fig.add_trace(go.Scatter(x=x, y=y, mode="markers", name="일 평균", marker={"color": "#9aa5b1", "size": 5}))
+    x, y = downsample(dates, rolling, max_points)
+    fig.add_trace(go.Scatter(x=x, y=y, mode="lines", name=f"{rolling_days}일 평균",
+                             line={"color": "#ff4b4b", "width": 2}, connectgaps=True))
+    if len(changes):
+        fig.add_trace(go.Scatter(
+            x=dates[changes], y=rolling[changes], mode="markers", name="변화점",
+            marker={"symbol": "diamond", "size": 11, "color": "#1f77b4"},
+        ))
+    fig.update_layout(
+        height=320, margin={"l": 10, "r": 10, "t": 10, "b": 10},
+        yaxis={"range": [0, 10.5], "title": "통증"}, legend={"orientation": "h", "y": -0.2},
+    )
+    return fig, dates[changes]
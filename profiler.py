@@ -0,0 +1,159 @@
+"""
+재실행 단위 구간 타이밍 (선택 기능)
+Streamlit 재실행마다 rerun id 를 붙이고, 그 안에서 DB 조회·임베딩·match_documents·
+gpt-4o·로그 저장·캘린더 위젯 생성 같은 구간을 중첩 span 으로 잰다.
+
+- 최근 max_reruns 개 재실행을 메모리에 보관 (관리자 사이드바 패널에서 표시)
+- export_path 를 주면 끝난 재실행을 JSONL 로 한 줄씩 덧붙인다
+- 꺼져 있으면 span() 이 공용 no-op 객체를 돌려주므로 오버헤드가 거의 없다
+- 재실행은 스크립트 스레드 기준이다. 워커 스레드의 span 은 capture() 로 받은 문맥을
+  attach() 로 넘겨 준 경우에만 그 재실행에 기록한다 (이미 끝난 재실행에는 붙이지 않는다)
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_stack", "_rerun", "_record", "_started")
+
+    def __init__(self, stack, rerun, name):
+        self._stack = stack
+        self._rerun = rerun
+        self._record = {"name": name, "depth": stack[-1]["depth"] + 1 if stack else 0,
+                        "parent": stack[-1]["index"] if stack else None}
+
+    def __enter__(self):
+        with self._rerun["_lock"]:
+            if self._rerun["_closed"]:
+                self._record = None
+                return self
+            spans = self._rerun["spans"]
+            self._record["index"] = len(spans)
+            spans.append(self._record)
+        self._stack.append(self._record)
+        self._started = time.perf_counter()
+        self._record["start_ms"] = (self._started - self._rerun["_t0"]) * 1000
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._record is None:
+            return False
+        self._record["duration_ms"] = (time.perf_counter() - self._started) * 1000
+        if exc_type is not None:
+            self._record["error"] = exc_type.__name__
+        self._stack.pop()
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled: bool = False, max_reruns: int = 20, export_path: str | None = None):
+        self.enabled = enabled
+        self.export_path = export_path
+        self._local = threading.local()
+        self._open: dict[str, dict] = {}
+        self._reruns: deque[dict] = deque(maxlen=max_reruns)
+        self._lock = threading.Lock()
+
+    def begin_rerun(self, session_key: str, label: str = ""):
+        if not self.enabled:
+            return
+        # st.rerun()/st.stop() 으로 끝까지 못 간 이전 재실행은 여기서 마감한다
+        with self._lock:
+            previous = self._open.pop(session_key, None)
+        if previous is not None:
+            self._finish(previous)
+        rerun = {
+            "rerun_id": uuid.uuid4().hex[:12],
+            "session": session_key,
+            "label": label,
+            "started_at": time.time(),
+            "duration_ms": None,
+            "spans": [],
+            "_t0": time.perf_counter(),
+            "_lock": threading.Lock(),
+            "_closed": False,
+        }
+        with self._lock:
+            self._open[session_key] = rerun
+        self._local.rerun = rerun
+        self._local.stack = []
+
+    def end_rerun(self):
+        rerun = getattr(self._local, "rerun", None)
+        if rerun is None:
+            return
+        self._local.rerun = None
+        with self._lock:
+            if self._open.get(rerun["session"]) is rerun:
+                del self._open[rerun["session"]]
+        rerun["duration_ms"] = (time.perf_counter() - rerun["_t0"]) * 1000
+        self._finish(rerun)
+
+    def _finish(self, rerun: dict):
+        with rerun["_lock"]:
+            rerun["_closed"] = True
+            spans = list(rerun["spans"])
+        if rerun["duration_ms"] is None:
+            ends = [s["start_ms"] + s.get("duration_ms", 0.0) for s in spans]
+            rerun["duration_ms"] = max(ends, default=0.0)
+        record = {k: v for k, v in rerun.items() if not k.startswith("_")}
+        record["spans"] = spans
+        with self._lock:
+            self._reruns.append(record)
+        if self.export_path:
+            with open(self.export_path, "a", encoding="utf-8") as fp:
+                fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def span(self, name: str):
+        if not self.enabled:
+            return NULL_SPAN
+        rerun = getattr(self._local, "rerun", None)
+        if rerun is None:
+            return NULL_SPAN
+        return _Span(self._local.stack, rerun, name)
+
+    def capture(self):
+        """스크립트 스레드의 현재 재실행과 열린 span. 워커에 넘겨 attach() 한다."""
+        rerun = getattr(self._local, "rerun", None) if self.enabled else None
+        if rerun is None:
+            return None
+        stack = self._local.stack
+        return rerun, stack[-1] if stack else None
+
+    @contextmanager
+    def attach(self, captured):
+        """워커 스레드에서 captured 재실행(및 부모 span) 아래로 span 을 기록한다."""
+        if captured is None:
+            yield
+            return
+        previous = (getattr(self._local, "rerun", None), getattr(self._local, "stack", None))
+        rerun, parent = captured
+        self._local.rerun = rerun
+        self._local.stack = [parent] if parent is not None else []
+        try:
+            yield
+        finally:
+            self._local.rerun, self._local.stack = previous
+
+    def recent(self) -> list[dict]:
+        with self._lock:
+            return list(reversed(self._reruns))
+
+    def to_jsonl(self) -> str:
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in reversed(self.recent()))
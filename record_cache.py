@@ -0,0 +1,127 @@
+"""
+월 단위 기록 캐시
+캘린더에서 날짜를 누를 때마다 재실행되며 같은 달의 daily_records 를 다시 조회하던
+것을, (year, month) 단위로 한 번만 읽고 모든 세션이 공유한다.
+
+- 오른쪽 날짜 패널은 월 데이터에서 골라 쓴다 (별도 조회 없음).
+- 앞/뒤 달은 백그라운드에서 미리 읽어 ◀/▶ 이동이 즉시 끝난다.
+- save_daily_record 가 쓴 날짜의 달만 정확히 무효화한다.
+- 다른 프로세스의 쓰기를 위해 ttl_seconds 가 지나면 다시 읽는다.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+
+
+def month_range(year: int, month: int) -> tuple[str, str]:
+    start = f"{year}-{month:02d}-01"
+    end_year, end_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return start, f"{end_year}-{end_month:02d}-01"
+
+
+def shift_month(year: int, month: int, delta: int) -> tuple[int, int]:
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def fetch_month_records(supabase_client, year: int, month: int) -> list[dict]:
+    start, end = month_range(year, month)
+    result = supabase_client.table("daily_records").select("*") \
+        .gte("record_date", start).lt("record_date", end).execute()
+    return result.data
+
+
+class MonthRecordCache:
+    def __init__(self, fetch_month, ttl_seconds: float = 300, max_months: int = 24):
+        self._fetch_month = fetch_month
+        self.ttl_seconds = ttl_seconds
+        self.max_months = max_months
+        self._months: OrderedDict[tuple[int, int], tuple[float, list[dict]]] = OrderedDict()
+        self._inflight: dict[tuple[int, int], Future] = {}
+        # 무효화 세대. 조회 도중 무효화되면 그 결과는 저장하지 않는다
+        self._generation: dict[tuple[int, int], int] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="month-prefetch")
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+        self.prefetches = 0
+
+    def _fresh(self, key) -> list[dict] | None:
+        entry = self._months.get(key)
+        if entry is None or time.time() - entry[0] > self.ttl_seconds:
+            return None
+        self._months.move_to_end(key)
+        return entry[1]
+
+    def _load(self, key) -> list[dict]:
+        with self._lock:
+            generation = self._generation.get(key, 0)
+            self.queries += 1
+        rows = self._fetch_month(*key)
+        with self._lock:
+            if self._generation.get(key, 0) == generation:
+                self._months[key] = (time.time(), rows)
+                self._months.move_to_end(key)
+                while len(self._months) > self.max_months:
+                    self._months.popitem(last=False)
+            self._inflight.pop(key, None)
+        return rows
+
+    def get_month(self, year: int, month: int) -> list[dict]:
+        key = (year, month)
+        with self._lock:
+            rows = self._fresh(key)
+            if rows is not None:
+                self.hits += 1
+                return rows
+            self.misses += 1
+            future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return future.result()
+            except Exception:
+                pass
+        return self._load(key)
+
+    def get_day(self, record_date) -> list[dict]:
+        d = record_date if isinstance(record_date, date) else date.fromisoformat(str(record_date))
+        date_str = str(d)
+        rows = [r for r in self.get_month(d.year, d.month) if r["record_date"] == date_str]
+        rows.sort(key=lambda r: r.get("created_at") or "", reverse=True)
+        return rows
+
+    def prefetch(self, year: int, month: int):
+        key = (year, month)
+        with self._lock:
+            if self._fresh(key) is not None or key in self._inflight:
+                return
+            self.prefetches += 1
+            self._inflight[key] = self._executor.submit(self._load, key)
+
+    def prefetch_adjacent(self, year: int, month: int):
+        for delta in (-1, 1):
+            self.prefetch(*shift_month(year, month, delta))
+
+    def invalidate(self, record_date):
+        d = record_date if isinstance(record_date, date) else date.fromisoformat(str(record_date))
+        key = (d.year, d.month)
+        with self._lock:
+            self._generation[key] = self._generation.get(key, 0) + 1
+            self._months.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "queries": self.queries,
+                "prefetches": self.prefetches,
+                "months": len(self._months),
+            }
@@ -0,0 +1,124 @@
+"""
+응급 신호(Red Flag) 로컬 감지기
+system_instruction 의 Red Flag 규칙을 네트워크 호출 없이 메시지 단계에서 바로 확인한다.
+검색/gpt-4o 응답을 기다리지 않고 응급실 안내 배너를 먼저 띄우기 위한 것이다.
+
+- 발열: 체온 38도 이상 (숫자를 뽑아 비교, "고열" 같은 표현 포함)
+- 통증: 갑작스럽고 극심한 통증 (표현 + "통증 9점", "9/10" 같은 점수, 기록의 pain_score)
+- 호흡: 숨참, 호흡곤란, 가슴 답답함
+- 의식: 의식 저하, 쳐짐, 실신, 경련
+패턴은 모듈 로드 시 한 번만 컴파일한다. 부정은 찾은 표현 자체를 부정할 때만 인정한다:
+바로 뒤에 조사/"-지" 어미와 함께 "않", "없", "아니", "안 나/올라/넘..." 이 붙을 때
+("열은 안 나요", "숨이 차지는 않아요"). "안 떨어져요", "안 멈춰요" 처럼 다른 동사를
+부정하는 경우나 사이에 다른 말이 끼면("39도인데 안 떨어져요") 부정으로 보지 않는다.
+진단이 아니라 안내용 선별이므로 놓치는 것보다 과하게 잡는 쪽을 택한다.
+"""
+
+import re
+
+FEVER_THRESHOLD = 38.0
+SEVERE_PAIN = 8
+
+LABELS = {
+    "fever": "🌡️ 38도 이상 발열",
+    "pain": "⚡ 갑작스럽거나 극심한 통증",
+    "breathing": "🫁 호흡곤란 / 가슴 답답함",
+    "consciousness": "😵 의식 저하 / 쳐짐",
+}
+
+_NEGATION = re.compile(
+    r"^(?:하?(?:지|진)\s*(?:는|도|가)?|까지는|까진|[은는이가도])?\s*"
+    r"(?:않|없|아니|안\s*(?:나(?![아았])|났|올|오|왔|넘|생기|생겼|있|했|해|하|보|돼|되))"
+)
+
+# 35~43도 범위의 숫자만 체온으로 본다 ("90도 각도", "30도 더위" 제외)
+_TEMPERATURE = re.compile(
+    r"(\d{2}(?:\.\d{1,2})?)\s*(?:도|℃|°\s*C?)|(?:체온|열)\D{0,6}?(\d{2}(?:\.\d{1,2})?)"
+)
+_PAIN_SCORE = re.compile(
+    r"(?:통증|아픔|아파|아프|고통)\D{0,8}?(\d{1,2})\s*(?:/\s*10|점|단계)"
+    r"|(\d{1,2})\s*(?:/\s*10|점)\D{0,6}?(?:통증|아픔|아파|아프)"
+)
+
+_PATTERNS = {
+    "fever": re.compile(r"고열|열이\s*(?:펄펄|많이|심하게|높)|불덩이"),
+    "pain": re.compile(
+        r"극심|참을\s*수\s*없|못\s*참|너무\s*아파서|죽을\s*(?:것\s*)?(?:같이|만큼)\s*아|"
+        r"갑자기\s*(?:\S+\s*){0,2}?(?:아파|아프|통증)|데굴데굴|찢어지는\s*(?:듯|것\s*같)"
+    ),
+    "breathing": re.compile(
+        r"숨이\s*(?:차|가빠|막|안\s*쉬어)|숨\s*(?:쉬기|쉬는\s*게)\s*(?:힘들|어렵|곤란)|숨을\s*(?:못|잘\s*못)|"
+        r"호흡\s*(?:곤란|이\s*(?:힘들|가쁘|어렵|빨라))|가슴이\s*(?:답답|조이|조여|짓눌)|헐떡|쌕쌕"
+    ),
+    "consciousness": re.compile(
+        r"의식이\s*(?:없|흐|떨어|희미|오락가락)|의식\s*(?:저하|불명|잃)|정신을\s*(?:잃|못\s*차리)|"
+        r"축\s*(?:늘어|처지|쳐지)|(?:자꾸|많이|계속|너무)\s*(?:쳐져|처져|쳐지|처지)|"
+        r"깨워도\s*(?:잘\s*)?(?:안|못)\s*(?:일어|깨)|반응이\s*(?:없|둔)|"
+        r"횡설수설|기절|실신|경련|발작|사람을\s*못\s*알아"
+    ),
+}
+
+
+# 부정 여부와 상관없이 응급 관련 단어가 하나라도 있으면 참. 캐시 우회/큰 모델 라우팅용 선별이라
+# detect() 보다 훨씬 넓게 잡는다 (오탐 허용, 미탐 불허)
+_EMERGENCY_WORDS = re.compile(
+    r"응급|119|응급실|숨|호흡|가슴|의식|쳐지|처지|쳐져|처져|기절|실신|경련|발작|출혈|피를|토혈|혈변|"
+    r"열|발열|체온|\d{2}(?:\.\d)?\s*(?:도|℃)|극심|심한\s*통증|못\s*참|갑자기|반응이|횡설수설"
+)
+
+
+def mentions_emergency(text: str) -> bool:
+    return bool(text) and bool(_EMERGENCY_WORDS.search(text) or detect(text))
+
+
+def _negated(text: str, end: int) -> bool:
+    return bool(_NEGATION.match(text[end:end + 12]))
+
+
+def extract_temperatures(text: str) -> list[float]:
+    values = []
+    for m in _TEMPERATURE.finditer(text):
+        value = float(m.group(1) or m.group(2))
+        if 35.0 <= value <= 43.0 and not _negated(text, m.end()):
+            values.append(value)
+    return values
+
+
+def extract_pain_scores(text: str) -> list[int]:
+    scores = []
+    for m in _PAIN_SCORE.finditer(text):
+        value = int(m.group(1) or m.group(2))
+        if 0 <= value <= 10:
+            scores.append(value)
+    return scores
+
+
+def detect(text: str) -> list[dict]:
+    """메시지에서 응급 신호를 찾는다. [{"rule", "label", "evidence"}] (없으면 빈 목록)"""
+    if not text:
+        return []
+    flags = {}
+    for value in extract_temperatures(text):
+        if value >= FEVER_THRESHOLD:
+            flags.setdefault("fever", f"체온 {value:g}도")
+    for value in extract_pain_scores(text):
+        if value >= SEVERE_PAIN:
+            flags.setdefault("pain", f"통증 {value}/10")
+    for rule, pattern in _PATTERNS.items():
+        if rule in flags:
+            continue
+        for m in pattern.finditer(text):
+            if not _negated(text, m.end()):
+                flags[rule] = m.group(0).strip()
+                break
+    return [{"rule": rule, "label": LABELS[rule], "evidence": flags[rule]}
+            for rule in LABELS if rule in flags]
+
+
+def scan_record(condition_text: str, pain_score: int | None = None) -> list[dict]:
+    """daily_records 한 건을 검사한다. 입력한 통증 점수도 기준에 넣는다."""
+    flags = detect(condition_text or "")
+    if pain_score is not None and pain_score >= SEVERE_PAIN and not any(f["rule"] == "pain" for f in flags):
+        flags.append({"rule": "pain", "label": LABELS["pain"], "evidence": f"통증 점수 {pain_score}/10"})
+        flags.sort(key=lambda f: list(LABELS).index(f["rule"]))
+    return flags
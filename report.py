@@ -0,0 +1,212 @@
+"""
+회진 레포트 생성 (map-reduce)
+기간의 모든 기록을 한 프롬프트에 이어 붙여 gpt-4o 에게 평균 통증 점수까지 계산시키던
+방식은 기간이 길어지면 느리고 비싸며 컨텍스트 한도를 넘는다.
+
+- 숫자 통계(통증 평균/최소/최대/추세, 일별 기록 수, 보호자별 기록 수)는 NumPy 로 로컬 계산
+- 기록은 날짜 단위로 끊어 토큰 예산 안의 구간(window)으로 나눈다
+- 구간 요약(map)은 병렬로 만들고, 마지막에 통계와 함께 한 번 합친다(reduce)
+- 한 구간에 다 들어가면 요약 단계 없이 바로 최종 레포트를 만든다
+- 구간 요약과 최종 레포트에 쓰는 모델은 따로 정할 수 있다 (model_router: 요약은 빠른 모델)
+- 여러 구간이 필요할 때만 달력 주(월~일) 경계에 맞춰 나누므로, 기간이 하루씩 밀려도
+  가운데 구간은 그대로여서 report_cache 의 구간 요약을 재사용할 수 있다
+"""
+
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+
+from report_cache import rows_hash
+
+REPORT_MODEL = "gpt-4o"
+SYSTEM_PROMPT = "당신은 암 환자의 담당 의사를 보조하는 임상 코디네이터입니다."
+WINDOW_TOKENS = 6000
+MAX_WORKERS = 4
+
+
+def estimate_tokens(content) -> int:
+    # 한글은 대략 글자당 1토큰 안팎이라 보수적으로 글자 수를 그대로 쓴다.
+    # 채팅 메시지의 멀티파트 content(list)는 텍스트 부분만 센다 (chat_history 도 이 함수를 쓴다)
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return len(str(content))
+
+
+def format_record(r: dict) -> str:
+    return (
+        f"[{r['record_date']}] 보호자: {r['caregiver_name']}, "
+        f"통증점수: {r.get('pain_score') or '기록없음'}/10\n"
+        f"{r.get('condition_text') or '내용 없음'}"
+    )
+
+
+def pain_stats(records: list[dict]) -> dict:
+    days = np.array([date.fromisoformat(r["record_date"]).toordinal() for r in records])
+    scores = np.array([r.get("pain_score") if r.get("pain_score") is not None else np.nan
+                       for r in records], dtype=float)
+    scored = ~np.isnan(scores)
+    unique_days, per_day = np.unique(days, return_counts=True)
+    stats = {
+        "entries": len(records),
+        "days_with_entries": len(unique_days),
+        "entries_per_day": float(per_day.mean()) if len(per_day) else 0.0,
+        "caregivers": dict(Counter(r["caregiver_name"] for r in records).most_common()),
+        "pain_mean": None,
+        "pain_min": None,
+        "pain_max": None,
+        "pain_trend_per_day": None,
+    }
+    if scored.any():
+        s = scores[scored]
+        stats.update(pain_mean=float(s.mean()), pain_min=float(s.min()), pain_max=float(s.max()))
+        d = days[scored]
+        if len(np.unique(d)) > 1:
+            # 날짜에 대한 1차 회귀 기울기 (점/일)
+            stats["pain_trend_per_day"] = float(np.polyfit(d - d.min(), s, 1)[0])
+    return stats
+
+
+def format_stats(stats: dict) -> str:
+    lines = [
+        f"- 기록 수: {stats['entries']}건 ({stats['days_with_entries']}일, 하루 평균 {stats['entries_per_day']:.1f}건)",
+        "- 보호자별 기록: " + ", ".join(f"{k} {v}건" for k, v in stats["caregivers"].items()),
+    ]
+    if stats["pain_mean"] is not None:
+        lines.append(
+            f"- 통증 점수: 평균 {stats['pain_mean']:.1f}, 최저 {stats['pain_min']:.0f}, 최고 {stats['pain_max']:.0f}"
+        )
+    if stats["pain_trend_per_day"] is not None:
+        slope = stats["pain_trend_per_day"]
+        direction = "악화" if slope > 0.05 else "호전" if slope < -0.05 else "큰 변화 없음"
+        lines.append(f"- 통증 추세: 하루 {slope:+.2f}점 ({direction})")
+    return "\n".join(lines)
+
+
+def _week(record_date: str) -> tuple[int, int]:
+    return date.fromisoformat(record_date).isocalendar()[:2]
+
+
+def split_windows(records: list[dict], budget: int = WINDOW_TOKENS) -> list[list[dict]]:
+    # records 는 record_date 순으로 정렬되어 있어야 한다. 하루치 기록은 쪼개지 않는다
+    # 전체가 예산 안이면 한 구간 (주 경계로 나누지 않는다)
+    if sum(estimate_tokens(format_record(r)) for r in records) <= budget:
+        return [records] if records else []
+    windows, current, used = [], [], 0
+    i = 0
+    while i < len(records):
+        j = i
+        while j < len(records) and records[j]["record_date"] == records[i]["record_date"]:
+            j += 1
+        day = records[i:j]
+        cost = sum(estimate_tokens(format_record(r)) for r in day)
+        new_week = current and _week(current[-1]["record_date"]) != _week(day[0]["record_date"])
+        if current and (new_week or used + cost > budget):
+            windows.append(current)
+            current, used = [], 0
+        current.extend(day)
+        used += cost
+        i = j
+    if current:
+        windows.append(current)
+    return windows
+
+
+def _complete(client, prompt: str, model: str = REPORT_MODEL, route: str = "report",
+              record=None) -> str:
+    started = time.perf_counter()
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.3,
+    )
+    if record is not None:
+        # record(route, model, 초, ttft, prompt_tokens, completion_tokens)
+        usage = getattr(response, "usage", None)
+        record(route, model, time.perf_counter() - started, None,
+               getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None))
+    return response.choices[0].message.content
+
+
+def summarize_window(client, window: list[dict], model: str = REPORT_MODEL, record=None) -> str:
+    records_text = "\n".join(format_record(r) for r in window)
+    prompt = f"""
+다음은 {window[0]['record_date']}부터 {window[-1]['record_date']}까지의 보호자 관찰 기록입니다.
+나중에 전체 기간 레포트로 합칠 수 있도록, 날짜별 주요 증상 변화와 보호자가 우려한 사항을
+빠짐없이 간결한 목록으로 정리해주세요. 통증 점수 평균 등 수치 계산은 하지 마세요.
+
+[관찰 기록]
+{records_text}"""
+    return _complete(client, prompt, model, "report.window", record)
+
+
+def final_prompt(pname, start_date, end_date, stats_text: str, body_label: str, body: str) -> str:
+    return f"""
+다음은 {pname} 환자의 {start_date}부터 {end_date}까지의 보호자 관찰 기록입니다.
+담당 의사가 회진 시 참고할 수 있도록 핵심 내용을 의학적 관점에서 요약해주세요.
+통계 수치는 이미 계산된 값이므로 다시 계산하지 말고 그대로 인용하세요.
+
+[통계 (자동 계산)]
+{stats_text}
+
+[{body_label}]
+{body}
+
+다음 형식으로 작성해 주세요:
+1. 통증 패턴 요약 (평균 점수, 악화 시간대 등)
+2. 주요 증상 변화
+3. 보호자가 특별히 우려한 사항
+4. 의사에게 건의할 사항"""
+
+
+def generate_report(client, records: list[dict], pname: str, start_date, end_date,
+                    window_tokens: int = WINDOW_TOKENS, max_workers: int = MAX_WORKERS,
+                    cache=None, window_model: str = REPORT_MODEL, final_model: str = REPORT_MODEL,
+                    record=None) -> tuple[str, dict]:
+    """레포트 본문과 {"key", "cached", "windows", "reused_windows"} 정보를 돌려준다."""
+    records = sorted(records, key=lambda r: (r["record_date"], r.get("created_at") or ""))
+    report_key = rows_hash(records, pname, start_date, end_date, window_tokens,
+                           window_model, final_model)
+    info = {"key": report_key, "cached": False, "windows": 0, "reused_windows": 0}
+    if cache is not None:
+        report_text = cache.get("report", report_key)
+        if report_text is not None:
+            info["cached"] = True
+            return report_text, info
+
+    stats_text = format_stats(pain_stats(records))
+    windows = split_windows(records, window_tokens)
+    info["windows"] = len(windows)
+    if len(windows) <= 1:
+        body = "\n".join(format_record(r) for r in records)
+        report_text = _complete(client, final_prompt(pname, start_date, end_date, stats_text, "관찰 기록", body),
+                                final_model, "report.final", record)
+    else:
+        keys = [rows_hash(w, window_model) for w in windows]
+        summaries = [cache.get("window", k) if cache is not None else None for k in keys]
+        todo = [i for i, summary in enumerate(summaries) if summary is None]
+        info["reused_windows"] = len(windows) - len(todo)
+        if todo:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                fresh = list(pool.map(
+                    lambda i: summarize_window(client, windows[i], window_model, record), todo
+                ))
+            for i, summary in zip(todo, fresh):
+                summaries[i] = summary
+                if cache is not None:
+                    cache.put("window", keys[i], summary)
+        body = "\n\n".join(
+            f"### {w[0]['record_date']} ~ {w[-1]['record_date']}\n{s}"
+            for w, s in zip(windows, summaries)
+        )
+        report_text = _complete(client, final_prompt(pname, start_date, end_date, stats_text, "구간별 요약", body),
+                                final_model, "report.final", record)
+
+    if cache is not None:
+        cache.put("report", report_key, report_text)
+    return report_text, info
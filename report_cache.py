@@ -0,0 +1,79 @@
+"""
+회진 레포트 캐시
+매일 아침 "최근 7일" 레포트를 다시 만들 때, 바뀌지 않은 기록에 대한 요약은 그대로
+재사용하고 새로 생기거나 수정된 날짜만 다시 요약한다.
+
+- 구간 요약: 구간에 포함된 daily_records 행 내용의 해시로 저장
+- 최종 레포트: 환자명 + 기간 + 전체 행 해시로 저장 (같은 요청이면 즉시 반환)
+- SQLite 파일이라 재시작 후에도 유지된다. max_age_days 가 지난 항목은 정리한다.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# 프롬프트나 모델이 바뀌면 올려서 예전 요약을 쓰지 않게 한다
+PROMPT_VERSION = "1"
+
+_ROW_FIELDS = ("id", "record_date", "created_at", "caregiver_name", "pain_score", "condition_text")
+
+
+def rows_hash(records: list[dict], *extra) -> str:
+    payload = [PROMPT_VERSION, *map(str, extra), [[r.get(f) for f in _ROW_FIELDS] for r in records]]
+    raw = json.dumps(payload, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    def __init__(self, db_path: str, max_age_days: float = 90):
+        self.max_age_seconds = max_age_days * 86400
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS report_cache ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, text TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (kind, key))"
+        )
+        self._db.execute(
+            "DELETE FROM report_cache WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+        )
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, key: str) -> str | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text FROM report_cache WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, kind: str, key: str, text: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO report_cache (kind, key, text, created_at) VALUES (?, ?, ?, ?)",
+                (kind, key, text, time.time()),
+            )
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._db.execute(
+                "SELECT kind, COUNT(*) FROM report_cache GROUP BY kind"
+            ).fetchall())
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "windows": counts.get("window", 0),
+                "reports": counts.get("report", 0),
+            }
@@ -0,0 +1,146 @@
+"""
+회진 레포트 내보내기 (TXT / PDF)
+레포트 본문이 나오면 TXT·PDF 렌더링은 백그라운드 워커에 맡기고, 결과 바이트는
+레포트 해시로 캐시해 이후 재실행에서는 다운로드 버튼이 캐시된 바이트를 바로 쓴다.
+
+- PDF 는 한글(CJK) 폰트를 임베딩한다. latin-1 치환으로 한글을 지우지 않는다.
+- 폰트를 찾지 못하거나 렌더링이 실패하면 예외를 삼키지 않고 error 로 남겨 화면에 보인다.
+- cache_dir 를 주면 PDF 를 파일로도 저장해 재시작 후에도 다시 만들지 않는다.
+  max_age_days 가 지났거나 합계가 max_mb 를 넘으면 오래된 파일부터 지운다.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+FONT_CANDIDATES = (
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "NanumGothic.ttf"),
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+    "/usr/share/fonts/nanum/NanumGothic.ttf",
+    "/Library/Fonts/NanumGothic.ttf",
+    "C:/Windows/Fonts/malgun.ttf",
+)
+
+
+class ExportError(RuntimeError):
+    pass
+
+
+def find_cjk_font(font_path: str | None = None) -> str:
+    candidates = (font_path,) + FONT_CANDIDATES if font_path else FONT_CANDIDATES
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    raise ExportError(
+        "한글 PDF 폰트를 찾을 수 없습니다. NanumGothic.ttf 를 앱 폴더에 두거나 "
+        "[report_export] font_path 를 설정해주세요."
+    )
+
+
+def render_txt(pname: str, start_date, end_date, report_text: str) -> bytes:
+    return (
+        f"회진 레포트\n기간: {start_date} ~ {end_date}\n"
+        f"환자: {pname}\n\n{report_text}"
+    ).encode("utf-8")
+
+
+def render_pdf(pname: str, start_date, end_date, report_text: str, font_path: str) -> bytes:
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.add_font("CJK", fname=font_path)
+    pdf.set_font("CJK", size=14)
+    pdf.cell(0, 10, f"회진 레포트 - {pname}", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("CJK", size=11)
+    pdf.cell(0, 8, f"기간: {start_date} ~ {end_date}", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+    for line in report_text.split("\n"):
+        pdf.multi_cell(0, 7, line, new_x="LMARGIN", new_y="NEXT")
+    return bytes(pdf.output())
+
+
+class ReportExporter:
+    def __init__(self, font_path: str | None = None, cache_dir: str | None = None,
+                 max_items: int = 32, max_age_days: float = 30, max_mb: float = 200):
+        self.font_path = font_path
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.max_age_seconds = max_age_days * 86400
+        self.max_bytes = max_mb * 1024 * 1024
+        self._results: OrderedDict[str, dict] = OrderedDict()
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-export")
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.prune()
+
+    def prune(self):
+        """cache_dir 의 PDF 를 나이/전체 크기 기준으로 정리한다 (오래된 것부터)."""
+        if not self.cache_dir:
+            return
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".pdf"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        cutoff = time.time() - self.max_age_seconds
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def _pdf_path(self, key: str) -> str | None:
+        return os.path.join(self.cache_dir, f"{key}.pdf") if self.cache_dir else None
+
+    def _render(self, key, pname, start_date, end_date, report_text) -> dict:
+        result = {"txt": render_txt(pname, start_date, end_date, report_text),
+                  "pdf": None, "error": None}
+        pdf_path = self._pdf_path(key)
+        try:
+            if pdf_path and os.path.exists(pdf_path):
+                with open(pdf_path, "rb") as fp:
+                    result["pdf"] = fp.read()
+            else:
+                result["pdf"] = render_pdf(pname, start_date, end_date, report_text,
+                                           find_cjk_font(self.font_path))
+                if pdf_path:
+                    tmp_path = f"{pdf_path}.tmp"
+                    with open(tmp_path, "wb") as fp:
+                        fp.write(result["pdf"])
+                    os.replace(tmp_path, pdf_path)
+                    self.prune()
+        except Exception as e:
+            result["error"] = f"PDF 생성 실패: {e}"
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_items:
+                self._results.popitem(last=False)
+            self._inflight.pop(key, None)
+        return result
+
+    def submit(self, key: str, pname: str, start_date, end_date, report_text: str) -> Future:
+        with self._lock:
+            if key in self._results:
+                future = Future()
+                future.set_result(self._results[key])
+                return future
+            if key in self._inflight:
+                return self._inflight[key]
+            future = self._executor.submit(self._render, key, pname, start_date, end_date, report_text)
+            self._inflight[key] = future
+            return future
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            return self._results.get(key)
@@ -0,0 +1,216 @@
+"""
+공유 리소스 레이어
+Streamlit 은 클릭할 때마다 app.py 전체를 다시 실행하므로, 외부 클라이언트는
+여기서 프로세스당 한 번만 만들고 모든 세션/재실행이 같은 객체를 재사용한다.
+
+- OpenAI 와 임베딩 클라이언트는 하나의 httpx 커넥션 풀을 공유한다.
+- openai / supabase 는 처음 필요할 때 임포트한다 (로그인 화면은 비용 없음).
+- langchain 계열은 retrieve_context 가 처음 호출될 때만 임포트한다.
+
+st.cache_resource 대신 functools.lru_cache 를 쓴다. 임포트된 모듈은 Streamlit
+재실행 사이에 유지되므로 효과는 같고, upload_docs.py 나 벤치마크처럼 Streamlit
+런타임 밖에서도 동일하게 캐시된다.
+"""
+
+import hashlib
+from functools import lru_cache
+
+import httpx
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+@lru_cache(maxsize=None)
+def get_http_client() -> httpx.Client:
+    return httpx.Client(
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_openai_client(api_key: str):
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, http_client=get_http_client())
+
+
+@lru_cache(maxsize=None)
+def get_supabase_client(url: str, key: str):
+    from supabase import create_client
+    return create_client(url, key)
+
+
+@lru_cache(maxsize=None)
+def get_vector_store(api_key: str, url: str, key: str):
+    from langchain_openai import OpenAIEmbeddings
+    from langchain_community.vectorstores import SupabaseVectorStore
+
+    embeddings = OpenAIEmbeddings(
+        openai_api_key=api_key,
+        model=EMBEDDING_MODEL,
+        http_client=get_http_client(),
+    )
+    return SupabaseVectorStore(
+        client=get_supabase_client(url, key),
+        embedding=embeddings,
+        table_name="documents",
+        query_name="match_documents",
+    )
+
+
+@lru_cache(maxsize=None)
+def get_embedding_cache(db_path: str = "", max_items: int = 512, max_db_mb: int = 50):
+    from embedding_cache import EmbeddingCache
+    return EmbeddingCache(
+        EMBEDDING_MODEL,
+        max_items=max_items,
+        db_path=db_path or None,
+        max_db_bytes=max_db_mb * 1024 * 1024,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_answer_cache(url: str, key: str, threshold: float = 0.95, ttl_minutes: float = 60):
+    from answer_cache import AnswerCache
+
+    def documents_version(page_size: int = 1000):
+        # 청크 id 는 내용 해시(uuid5)라, 전체 id 체크섬은 같은 개수로 다시 올려도 내용이 바뀌면 달라진다
+        client = get_supabase_client(url, key)
+        digest, last_id = hashlib.sha256(), None
+        while True:
+            query = client.table("documents").select("id").order("id").limit(page_size)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.execute().data
+            for row in rows:
+                digest.update(f"{row['id']}\n".encode("utf-8"))
+            if len(rows) < page_size:
+                return digest.hexdigest()
+            last_id = rows[-1]["id"]
+
+    return AnswerCache(
+        threshold=threshold,
+        ttl_seconds=ttl_minutes * 60,
+        documents_version=documents_version,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_write_behind_queue(url: str, key: str, batch_size: int = 50, flush_interval: float = 1.0):
+    from write_behind import WriteBehindQueue
+    return WriteBehindQueue(
+        get_supabase_client(url, key),
+        batch_size=batch_size,
+        flush_interval=flush_interval,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_local_store(url: str, key: str, db_path: str = ".cache/local_store.sqlite3",
+                    batch_size: int = 50, sync_interval: float = 2.0):
+    from local_store import LocalWriteStore
+    return LocalWriteStore(
+        get_supabase_client(url, key),
+        db_path=db_path,
+        batch_size=batch_size,
+        sync_interval=sync_interval,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_record_cache(url: str, key: str, ttl_seconds: float = 300):
+    from record_cache import MonthRecordCache, fetch_month_records
+
+    def fetch_month(year, month):
+        return fetch_month_records(get_supabase_client(url, key), year, month)
+
+    return MonthRecordCache(fetch_month, ttl_seconds=ttl_seconds)
+
+
+@lru_cache(maxsize=None)
+def get_report_cache(db_path: str = ".cache/reports.sqlite3", max_age_days: float = 90):
+    from report_cache import ReportCache
+    return ReportCache(db_path, max_age_days=max_age_days)
+
+
+@lru_cache(maxsize=None)
+def get_pain_aggregates(url: str, key: str, db_path: str = ".cache/pain_aggregates.sqlite3",
+                        sync_interval: float = 60):
+    from pain_analytics import PainAggregates, fetch_records_after
+    return PainAggregates(
+        db_path,
+        lambda last_id: fetch_records_after(get_supabase_client(url, key), last_id),
+        sync_interval=sync_interval,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_report_exporter(font_path: str = "", cache_dir: str = ".cache/exports",
+                        max_age_days: float = 30, max_mb: float = 200):
+    from report_export import ReportExporter
+    return ReportExporter(font_path=font_path or None, cache_dir=cache_dir or None,
+                          max_age_days=max_age_days, max_mb=max_mb)
+
+
+@lru_cache(maxsize=None)
+def get_attachment_store(root: str = "saved_images", thumb_size: int = 320):
+    from attachments import AttachmentStore
+    return AttachmentStore(root=root, thumb_size=thumb_size)
+
+
+@lru_cache(maxsize=None)
+def get_local_index(url: str, key: str, path: str = ".cache/documents_index",
+                    max_age_seconds: float = 600):
+    from local_index import LocalVectorIndex
+
+    def fetch_ids(page_size=1000):
+        ids, offset = [], 0
+        while True:
+            result = get_supabase_client(url, key).table("documents").select("id") \
+                .order("id").range(offset, offset + page_size - 1).execute()
+            ids.extend(r["id"] for r in result.data)
+            if len(result.data) < page_size:
+                return ids
+            offset += page_size
+
+    def fetch_rows(ids, batch_size=100):
+        rows = []
+        for i in range(0, len(ids), batch_size):
+            result = get_supabase_client(url, key).table("documents") \
+                .select("id, content, embedding").in_("id", ids[i:i + batch_size]).execute()
+            rows.extend(result.data)
+        return rows
+
+    index = LocalVectorIndex(fetch_ids, fetch_rows, path=path or None,
+                             max_age_seconds=max_age_seconds)
+    index.sync_in_background()
+    return index
+
+
+@lru_cache(maxsize=None)
+def get_chat_executor(max_workers: int = 4):
+    # 채팅 턴 안에서 답변 캐시 저장 등을 응답 경로 밖으로 빼는 공용 워커 (검색은 get_retrieval_pool)
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-pipeline")
+
+
+@lru_cache(maxsize=None)
+def get_retrieval_pool(max_workers: int = 4):
+    # 검색(임베딩 + match_documents) 전용 워커와 빈자리 세마포어.
+    # 제한 시간을 넘겨 멈춘 검색은 이 풀의 자리만 붙잡고, 자리가 다 차면 새 턴은 기다리지 않고 검색을 건너뛴다
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-retrieval")
+    return executor, threading.BoundedSemaphore(max_workers)
+
+
+@lru_cache(maxsize=None)
+def get_route_stats(log_path: str = ""):
+    from model_router import RouteStats
+    return RouteStats(log_path=log_path or None)
+
+
+@lru_cache(maxsize=None)
+def get_profiler(enabled: bool = False, max_reruns: int = 20, export_path: str = ""):
+    from profiler import Profiler
+    return Profiler(enabled=enabled, max_reruns=max_reruns, export_path=export_path or None)
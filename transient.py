@@ -0,0 +1,37 @@
+"""
+일시적 오류 판별 (write_behind / local_store 공용)
+다시 보내면 성공할 수 있는 오류면 참. 백그라운드 쓰기는 이런 오류를 재시도 횟수에 넣지
+않고 백오프만 하며, 거짓인 오류(서버가 행 자체를 거절)만 세어 빼낸다.
+
+- 연결/타임아웃: httpx.TransportError, OSError, TimeoutError
+- HTTP 5xx, 429: httpx.HTTPStatusError 또는 postgrest APIError 의 code 가 상태 코드일 때
+  (응답 본문이 JSON 이 아니면 postgrest 는 code 에 상태 코드를 넣는다)
+- PostgREST/Postgres 의 연결·자원·동시성 오류 코드 (PGRST000~003, 08/53/57 클래스, 40001, 40P01)
+- code 가 없는 오류(게이트웨이의 JSON 응답 등)는 메시지가 rate limit / timeout 류일 때만
+postgrest 는 임포트하지 않고 예외의 code 속성만 본다.
+"""
+
+import httpx
+
+_TRANSIENT_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003", "40001", "40P01"}
+_TRANSIENT_SQLSTATE_CLASSES = ("08", "53", "57")
+_TRANSIENT_MESSAGES = ("rate limit", "too many requests", "timeout", "timed out", "temporarily unavailable")
+
+
+def _transient_status(status) -> bool:
+    return status == 429 or 500 <= status < 600
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, (httpx.TransportError, OSError, TimeoutError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return _transient_status(error.response.status_code)
+    code = getattr(error, "code", None)
+    if code is None:
+        message = str(getattr(error, "message", None) or error).lower()
+        return any(m in message for m in _TRANSIENT_MESSAGES)
+    code = str(code)
+    if code.isdigit() and len(code) == 3:
+        return _transient_status(int(code))
+    return code in _TRANSIENT_CODES or (len(code) == 5 and code.startswith(_TRANSIENT_SQLSTATE_CLASSES))
@@ -1,6 +1,6 @@
 """
 관리자용 문서 업로드 스크립트
-사용법: python upload_docs.py <파일경로 또는 URL>
+사용법: python upload_docs.py <파일경로 | 폴더 | glob | URL> [...] [옵션]
 
 실행 전 환경변수 설정:
   export OPENAI_API_KEY="sk-..."
@@ -12,66 +12,533 @@
   python upload_docs.py ./treatment.docx
   python upload_docs.py https://example.com/article
   python upload_docs.py ./notes.txt
+  python upload_docs.py ./guidelines/ "./extra/**/*.pdf" --url-file urls.txt
+
+여러 소스를 주면 배치 모드로 동작한다.
+  - 문서 로드/분할은 프로세스 풀(--workers)에서 병렬로
+  - 임베딩은 --batch-size 청크씩 묶어 최대 --concurrency 개 요청만 동시에 보내고,
+    --rpm 으로 분당 요청 수를 제한한다
+  - 임베딩이 끝난 배치는 documents 테이블에 bulk insert 하고 진행률과 처리량(청크/초)을 출력한다
+
+같은 소스를 다시 올리면 바뀐 부분만 반영한다 (증분 재적재).
+  - 각 청크는 소스 + 본문 해시로 지문을 만들고, 그 지문에서 행 id 를 결정적으로 만든다
+  - 이미 있는 청크는 건너뛰고, 새 청크만 임베딩/저장하며, 소스에서 사라진 청크는 삭제한다
+  - 저장에 실패한 배치가 있으면 삭제는 하지 않는다 (옛 청크로라도 검색되게). 다시 실행해
+    모두 저장되면 그때 지운다
+  - --dry-run 은 아무것도 쓰지 않고 소스별 추가/삭제/유지 개수만 보여준다
+
+소스가 하나면 스트리밍으로 적재한다 (메모리 상한 고정).
+  - 페이지를 lazy_load() 로 하나씩 읽어 바로 분할하고, --batch-size 청크가 모이면
+    그 구간(window)만 임베딩/저장한다
+  - 동시에 떠 있는 구간은 --concurrency 개까지라 문서 크기와 관계없이 메모리가 일정하다
+
+적재는 작업(job) 단위로 .cache/ingest/ 에 체크포인트를 남긴다.
+  - 저장이 끝난 배치의 청크 id 를 기록하므로, 중간에 죽어도 같은 명령을 다시 실행하면
+    이미 저장된 배치는 건너뛰고 이어서 적재한다
+  - 실패한 배치는 지수 백오프로 재시도하며, 그동안 다른 배치는 계속 진행된다
 """
 
+import argparse
+import glob
+import hashlib
+import json
 import os
 import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    Docx2txtLoader,
-    TextLoader,
-    WebBaseLoader,
-)
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import SupabaseVectorStore
-from supabase import create_client
+from documents_marker import touch_documents_marker
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
 
-if not all([OPENAI_API_KEY, SUPABASE_URL, SUPABASE_KEY]):
-    print("❌ 환경변수를 설정해주세요: OPENAI_API_KEY, SUPABASE_URL, SUPABASE_KEY")
-    sys.exit(1)
+EMBEDDING_MODEL = "text-embedding-3-small"
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".md")
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+# 청크 id 는 uuid5(이 네임스페이스, "소스\n본문해시") 로 정해진다
+CHUNK_NAMESPACE = uuid.UUID("6f1c1d2e-6b0a-4c55-9a43-3c1f0b5e2d71")
+CHECKPOINT_DIR = os.path.join(".cache", "ingest")
 
-supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
-embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY, model="text-embedding-3-small")
 
+def is_url(source: str) -> bool:
+    return source.startswith("http://") or source.startswith("https://")
 
-def upload(source: str):
-    print(f"📄 로딩 중: {source}")
 
-    if source.startswith("http://") or source.startswith("https://"):
-        loader = WebBaseLoader(source)
-    elif source.endswith(".pdf"):
-        loader = PyPDFLoader(source)
-    elif source.endswith(".docx"):
-        loader = Docx2txtLoader(source)
-    else:
-        loader = TextLoader(source, encoding="utf-8")
-
-    docs = loader.load()
-    print(f"✅ 문서 로드 완료 ({len(docs)}페이지)")
-
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    chunks = splitter.split_documents(docs)
-    print(f"✅ {len(chunks)}개 청크로 분할 완료")
-
-    print("⏳ 임베딩 생성 및 Supabase 저장 중...")
-    SupabaseVectorStore.from_documents(
-        chunks,
-        embeddings,
-        client=supabase_client,
-        table_name="documents",
-        query_name="match_documents",
+def make_loader(source: str):
+    from langchain_community.document_loaders import (
+        PyPDFLoader,
+        Docx2txtLoader,
+        TextLoader,
+        WebBaseLoader,
     )
-    print(f"🎉 업로드 완료: {len(chunks)}개 청크 저장됨")
 
+    if is_url(source):
+        return WebBaseLoader(source)
+    if source.endswith(".pdf"):
+        return PyPDFLoader(source)
+    if source.endswith(".docx"):
+        return Docx2txtLoader(source)
+    return TextLoader(source, encoding="utf-8")
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("사용법: python upload_docs.py <파일경로 또는 URL>")
+
+def iter_chunks(source: str):
+    # 페이지를 하나씩 읽어 바로 분할한다. 문서 전체를 메모리에 올리지 않는다
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    for page in make_loader(source).lazy_load():
+        for c in splitter.split_documents([page]):
+            yield c.page_content, dict(c.metadata)
+
+
+def load_and_split(source: str) -> list[tuple[str, dict]]:
+    # 프로세스 풀에서 실행되므로 피클 가능한 (본문, 메타데이터) 튜플로 돌려준다
+    return list(iter_chunks(source))
+
+
+def expand_sources(patterns: list[str], url_file: str | None = None) -> list[str]:
+    sources = []
+    for pattern in patterns:
+        if is_url(pattern):
+            sources.append(pattern)
+        elif os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                sources.extend(os.path.join(root, f) for f in sorted(files)
+                               if f.lower().endswith(SUPPORTED_EXTENSIONS))
+        elif glob.has_magic(pattern):
+            sources.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            sources.append(pattern)
+    if url_file:
+        with open(url_file, encoding="utf-8") as fp:
+            sources.extend(line.strip() for line in fp
+                           if line.strip() and not line.startswith("#"))
+    # 순서는 유지하고 중복만 제거
+    return list(dict.fromkeys(sources))
+
+
+def source_key(source: str) -> str:
+    return source if is_url(source) else os.path.normpath(source)
+
+
+def source_aliases(source: str) -> list[str]:
+    # 예전 스크립트는 입력한 경로를 그대로 metadata.source 에 넣었다 ("./cancer_guide.pdf").
+    # 그런 행도 같은 소스로 보고 새 청크로 바꿔 넣는다
+    key = source_key(source)
+    aliases = {source, key}
+    if not is_url(source) and not os.path.isabs(key):
+        aliases.add(f".{os.sep}{key}")
+        aliases.add(f"./{key}")
+    return sorted(aliases)
+
+
+def fingerprint_chunk(key: str, text: str, metadata: dict) -> dict:
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return {
+        "id": str(uuid.uuid5(CHUNK_NAMESPACE, f"{key}\n{content_hash}")),
+        "content": text,
+        "metadata": {**metadata, "source": key, "content_hash": content_hash},
+    }
+
+
+def fingerprint_chunks(source: str, chunks: list[tuple[str, dict]]) -> list[dict]:
+    key = source_key(source)
+    rows = {}
+    for text, metadata in chunks:
+        row = fingerprint_chunk(key, text, metadata)
+        # 한 소스 안에서 본문이 완전히 같은 청크는 한 번만 저장한다
+        rows.setdefault(row["id"], row)
+    return list(rows.values())
+
+
+def existing_ids(supabase_client, source: str, page_size: int = 1000) -> set[str]:
+    ids = set()
+    # 경로 값에 "." "/" 가 있어 in.() 목록 대신 표기마다 eq 로 읽는다 (많아야 몇 개)
+    for alias in source_aliases(source):
+        offset = 0
+        while True:
+            result = supabase_client.table("documents").select("id") \
+                .eq("metadata->>source", alias) \
+                .order("id").range(offset, offset + page_size - 1).execute()
+            ids.update(r["id"] for r in result.data)
+            if len(result.data) < page_size:
+                break
+            offset += page_size
+    return ids
+
+
+def plan_source(supabase_client, source: str, chunks: list[tuple[str, dict]]):
+    """(새로 넣을 행, 지울 id, 그대로인 청크 수) 를 돌려준다."""
+    rows = fingerprint_chunks(source, chunks)
+    current = existing_ids(supabase_client, source)
+    new_rows = [r for r in rows if r["id"] not in current]
+    stale_ids = sorted(current - {r["id"] for r in rows})
+    return new_rows, stale_ids, len(rows) - len(new_rows)
+
+
+def print_plan(source: str, new_rows, stale_ids, unchanged: int):
+    print(f"  {source}: +{len(new_rows)} 추가 · -{len(stale_ids)} 삭제 · ={unchanged} 유지")
+
+
+def delete_rows(supabase_client, ids: list[str], batch_size: int = 200):
+    for i in range(0, len(ids), batch_size):
+        supabase_client.table("documents").delete().in_("id", ids[i:i + batch_size]).execute()
+
+
+def get_clients():
+    if not all([OPENAI_API_KEY, SUPABASE_URL, SUPABASE_KEY]):
+        print("❌ 환경변수를 설정해주세요: OPENAI_API_KEY, SUPABASE_URL, SUPABASE_KEY")
+        sys.exit(1)
+    from langchain_openai import OpenAIEmbeddings
+    from supabase import create_client
+
+    supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY, model=EMBEDDING_MODEL)
+    return supabase_client, embeddings
+
+
+class RateLimiter:
+    """분당 요청 수 제한. 요청 간격을 일정하게 벌려 429 를 피한다."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Progress:
+    def __init__(self, total: int | None = None):
+        self.total = total
+        self.done = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, n: int):
+        with self._lock:
+            self.done += n
+            elapsed = time.perf_counter() - self.started
+            rate = self.done / elapsed if elapsed else 0.0
+            if self.total:
+                print(f"  [{self.done}/{self.total}] {self.done / self.total:6.1%} · {rate:.1f} 청크/초")
+            else:
+                print(f"  [{self.done}] {rate:.1f} 청크/초")
+
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.done / elapsed if elapsed else 0.0
+
+
+def store_batch(batch, embeddings, supabase_client, limiter: RateLimiter) -> int:
+    limiter.wait()
+    vectors = embeddings.embed_documents([row["content"] for row in batch])
+    rows = [{**row, "embedding": vector} for row, vector in zip(batch, vectors)]
+    # 결정적 id 라 같은 배치를 다시 보내도 중복 행이 생기지 않는다
+    supabase_client.table("documents").upsert(rows).execute()
+    return len(rows)
+
+
+class IngestCheckpoint:
+    """적재 작업의 로컬 체크포인트 (JSON lines).
+
+    저장이 끝난 배치마다 청크 id 를 한 줄씩 덧붙이고 바로 fsync 한다. 청크 id 는
+    소스 + 본문 해시에서 나오므로, 기록된 id 는 그 본문이 이미 저장되었다는 뜻이다.
+    작업이 실패 없이 끝나면 파일을 지운다.
+    """
+
+    def __init__(self, job_key: str, directory: str = CHECKPOINT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        name = hashlib.sha256(job_key.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        self.done: set[str] = set()
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as fp:
+                for line in fp:
+                    try:
+                        self.done.update(json.loads(line).get("ids", []))
+                    except json.JSONDecodeError:
+                        # 강제 종료로 마지막 줄이 잘렸을 수 있다
+                        continue
+        else:
+            with open(self.path, "w", encoding="utf-8") as fp:
+                fp.write(json.dumps({"job": job_key, "started_at": time.time()}, ensure_ascii=False) + "\n")
+
+    def record(self, ids):
+        ids = list(ids)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as fp:
+                fp.write(json.dumps({"ids": ids}) + "\n")
+                fp.flush()
+                os.fsync(fp.fileno())
+            self.done.update(ids)
+
+    def complete(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class BatchRunner:
+    """임베딩/저장 배치를 동시 concurrency 개까지 돌린다.
+
+    실패한 배치는 지수 백오프 후 다시 넣고, 그동안 나머지 배치는 계속 진행한다.
+    성공한 배치는 체크포인트에 기록한다.
+    """
+
+    def __init__(self, embeddings, supabase_client, concurrency: int = 4, rpm: float = 0,
+                 checkpoint: IngestCheckpoint | None = None, total: int | None = None,
+                 max_attempts: int = 6, base_backoff: float = 2.0, max_backoff: float = 120.0):
+        self._embeddings = embeddings
+        self._client = supabase_client
+        self.concurrency = concurrency
+        self.checkpoint = checkpoint
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.progress = Progress(total)
+        self.failed: list[list[dict]] = []
+        self._limiter = RateLimiter(rpm)
+        self._pool = ThreadPoolExecutor(max_workers=concurrency)
+        self._in_flight: deque = deque()
+        self._retries: list[tuple[float, list[dict], int]] = []
+
+    def _start(self, rows, attempt):
+        future = self._pool.submit(store_batch, rows, self._embeddings, self._client, self._limiter)
+        self._in_flight.append((future, rows, attempt))
+
+    def _collect(self):
+        future, rows, attempt = self._in_flight.popleft()
+        try:
+            stored = future.result()
+        except Exception as e:
+            if attempt + 1 >= self.max_attempts:
+                self.failed.append(rows)
+                print(f"  ❌ 배치 {len(rows)}개 청크 최종 실패: {e}")
+            else:
+                delay = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+                print(f"  ⚠️ 배치 실패 ({e}), {delay:.0f}초 후 재시도 ({attempt + 1}/{self.max_attempts - 1})")
+                self._retries.append((time.monotonic() + delay, rows, attempt + 1))
+            return
+        if self.checkpoint is not None:
+            self.checkpoint.record(row["id"] for row in rows)
+        self.progress.add(stored)
+
+    def _resubmit_due(self):
+        now = time.monotonic()
+        due = [r for r in self._retries if r[0] <= now]
+        self._retries = [r for r in self._retries if r[0] > now]
+        for _, rows, attempt in due:
+            self._start(rows, attempt)
+
+    def submit(self, rows: list[dict]):
+        self._resubmit_due()
+        # 떠 있는 배치가 concurrency 개를 넘지 않도록 가장 오래된 것부터 기다린다
+        while len(self._in_flight) >= self.concurrency:
+            self._collect()
+        self._start(rows, 0)
+
+    def finish(self) -> list[list[dict]]:
+        """남은 배치와 재시도를 모두 끝내고, 끝내 실패한 배치 목록을 돌려준다."""
+        while self._in_flight or self._retries:
+            if self._in_flight:
+                self._collect()
+            else:
+                time.sleep(max(0.0, min(r[0] for r in self._retries) - time.monotonic()))
+            self._resubmit_due()
+        self._pool.shutdown()
+        return self.failed
+
+
+def embed_and_store(rows, embeddings, supabase_client, batch_size: int = 100,
+                    concurrency: int = 4, rpm: float = 0,
+                    checkpoint: IngestCheckpoint | None = None) -> tuple[float, int]:
+    """행을 배치 단위로 임베딩/저장하고 (처리량(청크/초), 실패한 청크 수) 를 돌려준다."""
+    runner = BatchRunner(embeddings, supabase_client, concurrency, rpm, checkpoint, total=len(rows))
+    for i in range(0, len(rows), batch_size):
+        runner.submit(rows[i:i + batch_size])
+    failed = runner.finish()
+    return runner.progress.rate(), sum(len(b) for b in failed)
+
+
+def apply_plan(new_rows, stale_ids, embeddings, supabase_client, batch_size: int,
+               concurrency: int, rpm: float,
+               checkpoint: IngestCheckpoint | None = None) -> tuple[float | None, int, int]:
+    """(처리량, 실패한 청크 수, 지운 청크 수). 새 청크를 먼저 넣고 나서 지운다 (검색 결과가 비지 않도록)"""
+    rate, failed = None, 0
+    if new_rows:
+        print(f"⏳ {len(new_rows)}개 청크 임베딩 및 저장 중 (동시 요청 {concurrency}개)...")
+        rate, failed = embed_and_store(new_rows, embeddings, supabase_client, batch_size,
+                                       concurrency, rpm, checkpoint)
+    deleted = delete_stale(supabase_client, stale_ids, failed)
+    if len(new_rows) > failed or deleted:
+        touch_documents_marker()
+    return rate, failed, deleted
+
+
+def delete_stale(supabase_client, stale_ids: list[str], failed: int) -> int:
+    # 대체할 청크가 다 저장되지 않았으면 옛 청크를 남긴다. 다음 실행이 체크포인트로 이어서 지운다
+    if not stale_ids:
+        return 0
+    if failed:
+        print(f"⏸ 저장 실패 {failed}개가 있어 사라진 청크 {len(stale_ids)}개 삭제는 다음 실행으로 미룹니다.")
+        return 0
+    print(f"🧹 사라진 청크 {len(stale_ids)}개 삭제 중...")
+    delete_rows(supabase_client, stale_ids)
+    return len(stale_ids)
+
+
+def stream_source(source: str, embeddings, supabase_client, batch_size: int = 100,
+                  concurrency: int = 4, rpm: float = 0, dry_run: bool = False,
+                  checkpoint: IngestCheckpoint | None = None) -> dict:
+    """청크를 읽는 대로 batch_size 구간씩 임베딩/저장한다. 결과 통계를 돌려준다."""
+    key = source_key(source)
+    current = existing_ids(supabase_client, source)
+    if checkpoint is not None:
+        current |= checkpoint.done
+    seen: set[str] = set()
+    added = unchanged = 0
+    window: list[dict] = []
+    runner = None if dry_run else BatchRunner(embeddings, supabase_client, concurrency, rpm, checkpoint)
+
+    for text, metadata in iter_chunks(source):
+        row = fingerprint_chunk(key, text, metadata)
+        if row["id"] in seen:
+            continue
+        seen.add(row["id"])
+        if row["id"] in current:
+            unchanged += 1
+            continue
+        added += 1
+        if runner is None:
+            continue
+        window.append(row)
+        if len(window) >= batch_size:
+            runner.submit(window)
+            window = []
+    failed = 0
+    if runner is not None:
+        if window:
+            runner.submit(window)
+        failed = sum(len(b) for b in runner.finish())
+
+    stale_ids = sorted(current - seen)
+    deleted = len(stale_ids)
+    if not dry_run:
+        deleted = delete_stale(supabase_client, stale_ids, failed)
+        if added - failed or deleted:
+            touch_documents_marker()
+    return {"added": added - failed, "failed": failed, "deleted": deleted,
+            "unchanged": unchanged,
+            "rate": runner.progress.rate() if runner is not None and runner.progress.done else None}
+
+
+def report_resume(checkpoint: IngestCheckpoint):
+    if checkpoint.done:
+        print(f"↩️ 체크포인트에서 재개: {len(checkpoint.done)}개 청크는 이미 저장됨 ({checkpoint.path})")
+
+
+def finish_job(checkpoint: IngestCheckpoint, failed: int):
+    if failed:
+        print(f"⚠️ {failed}개 청크 저장 실패. 같은 명령을 다시 실행하면 남은 부분만 이어서 적재합니다.")
+    else:
+        checkpoint.complete()
+
+
+def upload(source: str, batch_size: int = 100, concurrency: int = 4, rpm: float = 0,
+           dry_run: bool = False):
+    supabase_client, embeddings = get_clients()
+    print(f"📄 스트리밍 적재: {source}")
+    checkpoint = None if dry_run else IngestCheckpoint(source_key(source))
+    if checkpoint is not None:
+        report_resume(checkpoint)
+    result = stream_source(source, embeddings, supabase_client, batch_size, concurrency, rpm,
+                           dry_run, checkpoint)
+    verb = "변경 예정" if dry_run else "업로드 완료"
+    print(f"🎉 {verb}: {result['added']}개 추가, {result['deleted']}개 삭제, {result['unchanged']}개 유지"
+          + (f", {result['rate']:.1f} 청크/초" if result["rate"] else ""))
+    if checkpoint is not None:
+        finish_job(checkpoint, result["failed"])
+
+
+def upload_many(sources: list[str], workers: int = 4, batch_size: int = 100,
+                concurrency: int = 4, rpm: float = 0, dry_run: bool = False):
+    supabase_client, embeddings = get_clients()
+    started = time.perf_counter()
+    checkpoint = None
+    if not dry_run:
+        checkpoint = IngestCheckpoint("\n".join(sorted(source_key(s) for s in sources)))
+        report_resume(checkpoint)
+    new_rows, stale_ids, failed = [], [], []
+    unchanged = 0
+    print(f"📚 {len(sources)}개 소스 로딩/분할 중 (프로세스 {workers}개)...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(load_and_split, s): s for s in sources}
+        for i, future in enumerate(as_completed(futures), 1):
+            source = futures[future]
+            try:
+                source_chunks = future.result()
+            except Exception as e:
+                failed.append(source)
+                print(f"  ❌ [{i}/{len(sources)}] {source}: {e}")
+                continue
+            print(f"  ✅ [{i}/{len(sources)}] {source} → {len(source_chunks)}개 청크")
+            source_new, source_stale, source_unchanged = plan_source(supabase_client, source, source_chunks)
+            if checkpoint is not None:
+                resumed = [r for r in source_new if r["id"] in checkpoint.done]
+                source_new = [r for r in source_new if r["id"] not in checkpoint.done]
+                source_unchanged += len(resumed)
+            print_plan(source, source_new, source_stale, source_unchanged)
+            new_rows.extend(source_new)
+            stale_ids.extend(source_stale)
+            unchanged += source_unchanged
+
+    if not dry_run:
+        rate, failed_chunks, deleted = apply_plan(new_rows, stale_ids, embeddings, supabase_client,
+                                                  batch_size, concurrency, rpm, checkpoint)
+        print(f"🎉 업로드 완료: {len(new_rows) - failed_chunks}개 추가, {deleted}개 삭제, {unchanged}개 유지"
+              + (f", {rate:.1f} 청크/초" if rate else "")
+              + f", 총 {time.perf_counter() - started:.1f}초")
+        finish_job(checkpoint, failed_chunks)
+    if failed:
+        print(f"⚠️ 실패한 소스 {len(failed)}개: {', '.join(failed)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="documents 테이블에 참고 문서를 업로드합니다.")
+    parser.add_argument("sources", nargs="*", help="파일, 폴더, glob 패턴 또는 URL")
+    parser.add_argument("--url-file", help="한 줄에 URL 하나씩 적힌 파일")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="로드/분할 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=100, help="임베딩 요청당 청크 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 임베딩 요청 수")
+    parser.add_argument("--rpm", type=float, default=0, help="분당 임베딩 요청 상한 (0 = 제한 없음)")
+    parser.add_argument("--dry-run", action="store_true", help="쓰지 않고 변경 내역만 출력")
+    args = parser.parse_args()
+
+    sources = expand_sources(args.sources, args.url_file)
+    if not sources:
+        parser.print_usage()
         sys.exit(1)
-    upload(sys.argv[1])
+    if len(sources) == 1:
+        upload(sources[0], args.batch_size, args.concurrency, args.rpm, args.dry_run)
+    else:
+        upload_many(sources, args.workers, args.batch_size, args.concurrency, args.rpm, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+지연 쓰기(write-behind) 큐
+채팅 한 턴마다 sessions / chat_logs 에 동기 insert 를 하면 네트워크 왕복이 그대로
+사용자 대기 시간이 된다. 여기서는 행을 큐에 넣고 바로 반환하며, 백그라운드 스레드가
+개수(batch_size) 또는 시간(flush_interval) 기준으로 모아 bulk insert 한다.
+
+- 같은 테이블이 연속된 구간끼리 묶어 보내므로 sessions → chat_logs 순서가 유지된다.
+- 실패하면 행을 버리지 않고 큐 앞쪽에 둔 채 지수 백오프로 재시도하고, 그 뒤로는 한 행씩
+  보낸다. 서버가 max_attempts 번 거절한 행은 dead_letter_path(JSONL)로 옮기고 나머지는
+  계속 보낸다. 일시적 오류(연결 끊김, 5xx, 429 — transient.is_transient)는 횟수에 넣지
+  않으므로 Supabase 장애가 길어져도 로그가 빠지지 않는다.
+- flush() 로 세션 종료(로그아웃) 시점에 비울 수 있고, 프로세스 종료 시에도 비운다.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from transient import is_transient
+
+
+class WriteBehindQueue:
+    def __init__(self, supabase_client, batch_size: int = 50, flush_interval: float = 1.0,
+                 max_backoff: float = 60.0, max_attempts: int = 8,
+                 dead_letter_path: str | None = ".cache/write_behind_dead.jsonl"):
+        self._client = supabase_client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.dead_letter_path = dead_letter_path
+        self._pending: deque[tuple[str, dict]] = deque()
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._closed = False
+        self._backoff = 0.0
+        self._one_by_one = False
+        self._head_attempts = 0
+        self.dead_rows = 0
+        self.flushed_rows = 0
+        self.flush_count = 0
+        self.failed_attempts = 0
+        self.last_error = None
+        self.last_flush_seconds = None
+        self._total_flush_seconds = 0.0
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, table: str, row: dict):
+        with self._cond:
+            self._pending.append((table, row))
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _ready(self) -> bool:
+        return self._closed or self._flush_requested or len(self._pending) >= self.batch_size
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._ready():
+                    self._cond.wait(self.flush_interval)
+                if self._closed and not self._pending:
+                    return
+                if not self._pending:
+                    self._flush_requested = False
+                    continue
+                limit = 1 if self._one_by_one else self.batch_size
+                batch = [self._pending[i] for i in range(min(limit, len(self._pending)))]
+
+            written, error = self._write(batch)
+
+            with self._cond:
+                for _ in range(written):
+                    self._pending.popleft()
+                if written:
+                    self._head_attempts = 0
+                if error is not None and self._one_by_one and not is_transient(error):
+                    # 한 행씩 보낼 때 서버가 거절한 행만 센다. 한도를 넘으면 빼내고 다음 행으로
+                    self._head_attempts += 1
+                    if self._head_attempts >= self.max_attempts and self._pending:
+                        self._dead_letter(*self._pending.popleft(), error)
+                        self._head_attempts = 0
+                if not self._pending:
+                    self._flush_requested = False
+                self._cond.notify_all()
+
+            if error is None:
+                self._backoff = 0.0
+                self._one_by_one = False
+            else:
+                self.failed_attempts += 1
+                self.last_error = repr(error)
+                self._backoff = min(self.max_backoff, (self._backoff * 2) or 0.5)
+                self._one_by_one = True
+                if self._closed:
+                    return
+                time.sleep(self._backoff)
+
+    def _dead_letter(self, table: str, row: dict, error: Exception):
+        self.dead_rows += 1
+        if not self.dead_letter_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.dead_letter_path)), exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as fp:
+                fp.write(json.dumps({"table": table, "row": row, "error": repr(error)[:500],
+                                     "at": time.time()}, ensure_ascii=False, default=str) + "\n")
+        except OSError:
+            pass
+
+    def _write(self, batch):
+        written = 0
+        started = time.perf_counter()
+        try:
+            i = 0
+            while i < len(batch):
+                table = batch[i][0]
+                j = i
+                while j < len(batch) and batch[j][0] == table:
+                    j += 1
+                self._client.table(table).insert([row for _, row in batch[i:j]]).execute()
+                written = j
+                i = j
+        except Exception as e:
+            return written, e
+        finally:
+            if written:
+                elapsed = time.perf_counter() - started
+                self.last_flush_seconds = elapsed
+                self._total_flush_seconds += elapsed
+                self.flush_count += 1
+                self.flushed_rows += written
+        return written, None
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth(),
+            "flushed_rows": self.flushed_rows,
+            "flush_count": self.flush_count,
+            "last_flush_ms": self.last_flush_seconds * 1000 if self.last_flush_seconds is not None else None,
+            "avg_flush_ms": self._total_flush_seconds / self.flush_count * 1000 if self.flush_count else None,
+            "failed_attempts": self.failed_attempts,
+            "dead_rows": self.dead_rows,
+            "last_error": self.last_error,
+            "backoff_seconds": self._backoff,
+        }